@@ -1,50 +1,50 @@
-from flask import Flask, render_template, request
+from flask import Flask, Response, render_template, request, jsonify
+import os
 import re
+import threading
+
+from artifact import ARTIFACT_SUFFIX
+from batching import MicroBatcher
+from cascade import CascadeClassifier, KnownTemplates
+from keywords import CURRENCY_KEYWORDS, HAM_KEYWORDS, SPAM_KEYWORDS, KeywordMatcher, keyword_weights
+from metrics import PipelineMetrics, render_prometheus
+from predict import SpamClassifier
+from registry import WARMUP_MESSAGES, HotReloader, ModelRegistry
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.environ.get('SPAM_MODEL_PATH', os.path.join(BASE_DIR, 'best_spam_classifier.pkl'))
+VECTORIZER_PATH = os.environ.get('SPAM_VECTORIZER_PATH', os.path.join(BASE_DIR, 'spam_vectorizer.pkl'))
+if MODEL_PATH.endswith(ARTIFACT_SUFFIX):
+    # Compact artifacts bundle the vectorizer with the model
+    VECTORIZER_PATH = None
+MAX_BATCH_SIZE = int(os.environ.get('SPAM_MAX_BATCH_SIZE', 1000))
+CACHE_SIZE = int(os.environ.get('SPAM_CACHE_SIZE', 0))
+METRICS_ENABLED = os.environ.get('SPAM_METRICS', '1') != '0'
+MICROBATCH_SIZE = int(os.environ.get('SPAM_MICROBATCH_SIZE', 64))
+MICROBATCH_WAIT_MS = float(os.environ.get('SPAM_MICROBATCH_WAIT_MS', 2.0))
+REGISTRY_DIR = os.environ.get('SPAM_REGISTRY_DIR')
+RELOAD_POLL_SECONDS = float(os.environ.get('SPAM_RELOAD_POLL_SECONDS', 5.0))
+CASCADE_ENABLED = os.environ.get('SPAM_CASCADE', '0') != '0'
+CASCADE_TEMPLATES_PATH = os.environ.get('SPAM_CASCADE_TEMPLATES')
+CASCADE_HAM_MIN_SCORE = float(os.environ.get('SPAM_CASCADE_HAM_MIN_SCORE', 1))
+CASCADE_SPAM_MIN_SCORE = float(os.environ.get('SPAM_CASCADE_SPAM_MIN_SCORE', 8))
+CASCADE_SPAM_MIN_RATIO = float(os.environ.get('SPAM_CASCADE_SPAM_MIN_RATIO', 0.7))
+# Larger batches skip the cascade's first stage (0 = no limit)
+CASCADE_MAX_BATCH_SIZE = int(os.environ.get('SPAM_CASCADE_MAX_BATCH_SIZE', 1)) or None
 
 app = Flask(__name__)
 
 class SpamDetector:
     def __init__(self):
-        self.spam_keywords = [
-            'free', 'win', 'prize', 'cash', 'money', 'claim', 'now', 'click',
-            'urgent', 'limited', 'offer', 'congratulations', 'winner', 'selected',
-            'award', 'bonus', 'discount', 'deal', 'save', 'profit', 'income',
-            'work from home', 'earn', 'salary', 'million', 'thousand', 'dollar',
-            '£', '$', '€', '!!!', 'urgent', 'immediately', 'act now', 'call now',
-            'text to', 'reply', 'subscribe', 'unsubscribe', 'winner', 'won',
-            'lucky', 'draw', 'lottery', 'jackpot', 'reward', 'grant', 'fund',
-            'investment', 'opportunity', 'risk-free', 'guarantee', 'trial',
-            'subscription', 'membership', 'fee', 'payment', 'credit', 'loan',
-            'mortgage', 'insurance', 'refinance', 'debt', 'bank', 'account',
-            'password', 'verify', 'confirm', 'update', 'information', 'security',
-            'alert', 'warning', 'important', 'notice', 'message', 'notification',
-            'deadline', 'expire', 'limited time', 'only', 'exclusive', 'special',
-            'secret', 'hidden', 'revealed', 'discovered', 'breakthrough', 'miracle',
-            'instant', 'fast', 'quick', 'easy', 'simple', 'proven', 'scientific',
-            'medical', 'health', 'weight', 'loss', 'diet', 'pill', 'supplement',
-            'cream', 'oil', 'product', 'service', 'business', 'marketing', 'sales',
-            'promotion', 'discount', 'coupon', 'voucher', 'code', 'offer', 'deal',
-            'clearance', 'sale', 'buy', 'purchase', 'order', 'shop', 'store',
-            'website', 'link', 'url', 'http', 'www', '.com', 'visit', 'click here',
-            'call', 'phone', 'mobile', 'text', 'sms', 'message', 'chat', 'contact',
-            'hello dear', 'dear friend', 'valued customer', 'valued member'
-        ]
+        self.spam_keywords = list(SPAM_KEYWORDS)
+        self.ham_keywords = list(HAM_KEYWORDS)
+        self.currency_keywords = list(CURRENCY_KEYWORDS)
         
-        self.ham_keywords = [
-            'hello', 'hi', 'hey', 'meeting', 'lunch', 'dinner', 'coffee', 'tea',
-            'tomorrow', 'today', 'yesterday', 'weekend', 'morning', 'evening',
-            'work', 'office', 'home', 'family', 'friend', 'friends', 'party',
-            'birthday', 'wedding', 'anniversary', 'congrats', 'congratulations',
-            'thanks', 'thank you', 'please', 'sorry', 'ok', 'okay', 'yes', 'no',
-            'maybe', 'probably', 'possibly', 'think', 'thought', 'idea', 'plan',
-            'project', 'task', 'assignment', 'deadline', 'meeting', 'appointment',
-            'doctor', 'dentist', 'hospital', 'school', 'college', 'university',
-            'class', 'lecture', 'seminar', 'workshop', 'training', 'course',
-            'holiday', 'vacation', 'travel', 'trip', 'flight', 'hotel', 'booking',
-            'reservation', 'ticket', 'movie', 'film', 'show', 'concert', 'game',
-            'sports', 'football', 'cricket', 'weather', 'rain', 'sunny', 'cold',
-            'hot', 'food', 'restaurant', 'cafe', 'bar', 'pub', 'club', 'music'
-        ]
+        # Precompute per-keyword weights so duplicate list entries and the
+        # extra currency weight are applied once per distinct hit
+        self.spam_weights, self.ham_weights = keyword_weights(
+            self.spam_keywords, self.ham_keywords, self.currency_keywords)
+        self.matcher = KeywordMatcher(list(self.spam_weights) + list(self.ham_weights))
     
     def predict(self, message):
         if not message or not message.strip():
@@ -52,17 +52,9 @@ class SpamDetector:
         
         message_lower = message.lower()
         
-        spam_score = 0
-        for keyword in self.spam_keywords:
-            if keyword in message_lower:
-                spam_score += 1
-                if keyword in ['$', '£', '€', 'money', 'cash', 'dollar']:
-                    spam_score += 1
-        
-        ham_score = 0
-        for keyword in self.ham_keywords:
-            if keyword in message_lower:
-                ham_score += 1
+        hits = self.matcher.find(message_lower)
+        spam_score = sum(self.spam_weights.get(keyword, 0) for keyword in hits)
+        ham_score = sum(self.ham_weights.get(keyword, 0) for keyword in hits)
         
         total_score = spam_score + ham_score
         if total_score == 0:
@@ -89,6 +81,27 @@ class SpamDetector:
 
 detector = SpamDetector()
 
+# Load the trained model once at process start, not per request. With a
+# registry configured, the current version is served and hot-swapped when
+# the registry's manifest changes.
+pipeline_metrics = PipelineMetrics() if METRICS_ENABLED else None
+if REGISTRY_DIR:
+    classifier = HotReloader(ModelRegistry(REGISTRY_DIR), poll_interval=RELOAD_POLL_SECONDS,
+                             cache_size=CACHE_SIZE, metrics=pipeline_metrics).start()
+else:
+    classifier = SpamClassifier(MODEL_PATH, VECTORIZER_PATH, cache_size=CACHE_SIZE,
+                                metrics=pipeline_metrics)
+model_server = classifier
+
+# Optionally decide obvious messages with known templates and keyword rules
+# and only send the uncertain ones to the model
+if CASCADE_ENABLED:
+    templates = KnownTemplates.load(CASCADE_TEMPLATES_PATH) if CASCADE_TEMPLATES_PATH else None
+    classifier = CascadeClassifier(model_server, templates, ham_min_score=CASCADE_HAM_MIN_SCORE,
+                                   spam_min_score=CASCADE_SPAM_MIN_SCORE,
+                                   spam_min_ratio=CASCADE_SPAM_MIN_RATIO,
+                                   max_batch_size=CASCADE_MAX_BATCH_SIZE)
+
 @app.route('/')
 def home():
     return '''
@@ -217,7 +230,134 @@ def predict():
     </html>
     '''
 
+_batcher = None
+_batcher_lock = threading.Lock()
+_ready = threading.Event()
+_warm_up_lock = threading.Lock()
+
+def warm_up():
+    """
+    Score a few messages so lazy initialisation (the NLTK stemmer import,
+    stem cache, sklearn dispatch) happens before the first request, then
+    mark ready
+
+    Runs once per process: serve.py calls it before forking, and under any
+    other WSGI host the first request (including a /ready probe) does.
+    """
+    with _warm_up_lock:
+        if _ready.is_set():
+            return
+        classifier.classify_batch(WARMUP_MESSAGES)
+        detector.predict(WARMUP_MESSAGES[0])
+        _ready.set()
+
+@app.before_request
+def _warm_up_on_first_request():
+    if not _ready.is_set():
+        warm_up()
+
+def after_fork():
+    """
+    Reset per-process state in a freshly forked server worker
+    
+    Threads do not survive fork, so the micro-batcher is recreated on first
+    use and the registry watcher is restarted in the child.
+    """
+    global _batcher, _batcher_lock
+    _batcher = None
+    _batcher_lock = threading.Lock()
+    if isinstance(model_server, HotReloader):
+        model_server.after_fork()
+
+def get_batcher():
+    """
+    Return the shared micro-batcher, starting its thread on first use
+    """
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher(classifier, max_batch_size=MICROBATCH_SIZE,
+                                    max_wait_ms=MICROBATCH_WAIT_MS)
+        return _batcher
+
+@app.route('/api/v1/classify', methods=['POST'])
+def classify_api():
+    """
+    Score a JSON array of messages (or {"messages": [...]}) in one batch
+    
+    A single {"message": "..."} is routed through the micro-batcher so
+    concurrent single-message requests share one model call.
+    """
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict) and isinstance(payload.get('message'), str):
+        label, spam_probability = get_batcher().classify(payload['message'])
+        result = {'label': label}
+        if spam_probability is not None:
+            result['spam_probability'] = spam_probability
+        return jsonify(result)
+    
+    messages = payload.get('messages') if isinstance(payload, dict) else payload
+    
+    if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+        return jsonify({'error': 'Expected a JSON array of message strings'}), 400
+    if len(messages) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_BATCH_SIZE} messages per request'}), 413
+    if not messages:
+        return jsonify({'count': 0, 'results': []})
+    
+    labels, spam_probabilities = classifier.classify_batch(messages)
+    
+    results = []
+    for i, label in enumerate(labels):
+        result = {'label': str(label)}
+        if spam_probabilities is not None:
+            result['spam_probability'] = float(spam_probabilities[i])
+        results.append(result)
+    
+    return jsonify({'count': len(results), 'results': results})
+
+@app.route('/ready')
+def ready():
+    """
+    Readiness check: 200 once the model is loaded and warmed up
+    """
+    if not _ready.is_set():
+        return jsonify({'status': 'warming up'}), 503
+    status = {'status': 'ready', 'pid': os.getpid()}
+    if isinstance(model_server, HotReloader):
+        status['model_version'] = model_server.version
+    return jsonify(status)
+
+@app.route('/metrics')
+def metrics():
+    """
+    Pipeline stage latencies, batch sizes and cache counters for Prometheus
+    """
+    gauges = {}
+    counters = {}
+    if isinstance(model_server, HotReloader):
+        stats = model_server.stats()
+        counters['spam_model_swaps_total'] = stats['swaps']
+        gauges.update({
+            'spam_model_version': stats['live_version'],
+            'spam_model_load_seconds': stats.get('load_seconds'),
+            'spam_model_warmup_seconds': stats.get('warmup_seconds'),
+            'spam_model_swap_memory_delta_mb': stats.get('memory_delta_mb')
+        })
+    if isinstance(classifier, CascadeClassifier):
+        stats = classifier.stats()
+        counters.update({
+            'spam_cascade_template_total': stats['template'],
+            'spam_cascade_rules_total': stats['rules'],
+            'spam_cascade_model_total': stats['model']
+        })
+        gauges['spam_cascade_short_circuit_ratio'] = stats['short_circuit_ratio']
+    body = render_prometheus(classifier.metrics, classifier.cache_stats(), gauges, counters)
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     print("🚀 Starting Spam Classifier...")
     print("🌐 Open: http://localhost:5000")
+    print("ℹ️  Development server; use serve.py for multi-worker production serving")
+    warm_up()
     app.run(debug=True)
\ No newline at end of file
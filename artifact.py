@@ -0,0 +1,277 @@
+import json
+import re
+import struct
+
+import numpy as np
+import scipy.sparse as sp
+
+from linear_scorer import LinearScorer
+
+MAGIC = b'SPAMART1'
+ALIGNMENT = 64
+ARTIFACT_SUFFIX = '.spamart'
+WEIGHT_DTYPES = ('float64', 'float32', 'int8')
+
+def _pad(length):
+    return (-length) % ALIGNMENT
+
+def write_arrays(path, arrays, meta):
+    """
+    Write named NumPy arrays and a JSON metadata dict to one flat file
+
+    Layout: magic, 8-byte header length, JSON header, then each array's raw
+    bytes aligned to 64 bytes so they can be memory-mapped in place. Array
+    offsets in the header are relative to the start of the data section.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes + _pad(array.nbytes)
+
+    header = json.dumps({'meta': meta, 'arrays': layout}).encode('utf-8')
+    header_end = len(MAGIC) + 8 + len(header)
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        f.write(b'\0' * _pad(header_end))
+        for array in arrays.values():
+            f.write(array.tobytes())
+            f.write(b'\0' * _pad(array.nbytes))
+
+def read_arrays(path, mmap=True):
+    """
+    Read a file written by write_arrays, returning (arrays, meta)
+
+    With mmap=True the arrays are read-only views onto a shared mapping of
+    the file, so forked or separately started workers share its pages.
+    """
+    if mmap:
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        with open(path, 'rb') as f:
+            buffer = np.frombuffer(f.read(), dtype=np.uint8)
+
+    if bytes(buffer[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"Not a spam classifier artifact: {path}")
+    header_start = len(MAGIC) + 8
+    header_length = struct.unpack('<Q', bytes(buffer[len(MAGIC):header_start]))[0]
+    header_end = header_start + header_length
+    header = json.loads(bytes(buffer[header_start:header_end]).decode('utf-8'))
+    data_start = header_end + _pad(header_end)
+
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                     offset=data_start + entry['offset']).reshape(entry['shape'])
+    return arrays, header['meta']
+
+def quantize_int8(array):
+    """
+    Affine int8 quantization of each row of a 1-D or 2-D float array
+
+    Returns (q, scale, offset) with one scale/offset per row, so that
+    offset + q * scale reproduces each value to within scale / 2.
+    """
+    rows = np.atleast_2d(np.asarray(array, dtype=np.float64))
+    low = rows.min(axis=1) if rows.size else np.zeros(rows.shape[0])
+    high = rows.max(axis=1) if rows.size else np.zeros(rows.shape[0])
+    offset = (high + low) / 2
+    scale = (high - low) / 254
+    scale[scale == 0] = 1.0
+    q = np.rint((rows - offset[:, np.newaxis]) / scale[:, np.newaxis]).astype(np.int8)
+    return q.reshape(np.shape(array)), scale, offset
+
+def _weight_arrays(name, array, dtype):
+    """
+    Arrays to store for a weight array exported as dtype
+    """
+    if dtype not in WEIGHT_DTYPES:
+        raise ValueError(f"Unsupported weight dtype: {dtype}")
+    if dtype != 'int8':
+        return {name: np.asarray(array, dtype=dtype)}
+    q, scale, offset = quantize_int8(array)
+    return {name: q, f'{name}_scale': scale, f'{name}_offset': offset}
+
+def _encode_terms(terms):
+    encoded = [term.encode('utf-8') for term in terms]
+    width = max([len(term) for term in encoded] + [1])
+    return np.array(encoded, dtype=f'S{width}')
+
+class CompactVectorizer:
+    """
+    TF-IDF transform backed by a sorted term array instead of a vocabulary dict
+
+    Reproduces TfidfVectorizer.transform for word analyzers with the default
+    preprocessor and tokenizer. idf may be stored as float32, or as int8
+    with idf_scale/idf_offset (see quantize_int8).
+    """
+    def __init__(self, terms, term_columns, idf, stop_words, config, idf_scale=None, idf_offset=None):
+        self.terms = terms
+        self.term_columns = term_columns
+        self.idf = idf
+        self.idf_scale = None if idf_scale is None else float(idf_scale[0])
+        self.idf_offset = None if idf_offset is None else float(idf_offset[0])
+        self.stop_words = frozenset(term.decode('utf-8') for term in stop_words.tolist())
+        self.lowercase = config['lowercase']
+        self.token_pattern = re.compile(config['token_pattern'])
+        self.ngram_range = tuple(config['ngram_range'])
+        self.norm = config['norm']
+        self.use_idf = config['use_idf']
+        self.sublinear_tf = config['sublinear_tf']
+        self.binary = config['binary']
+        self.n_features = config['n_features']
+
+    @staticmethod
+    def export(vectorizer):
+        """
+        Convert a fitted TfidfVectorizer into (arrays, config)
+        """
+        if (getattr(vectorizer, 'analyzer', None) != 'word' or vectorizer.preprocessor is not None
+                or vectorizer.tokenizer is not None or vectorizer.strip_accents is not None):
+            raise ValueError("Only word analyzers with default preprocessing can be exported")
+        if not vectorizer.vocabulary_:
+            raise ValueError("Cannot export a vectorizer with an empty vocabulary")
+
+        terms = sorted(vectorizer.vocabulary_)
+        stop_words = sorted(vectorizer.get_stop_words() or [])
+        arrays = {
+            'terms': _encode_terms(terms),
+            'term_columns': np.array([vectorizer.vocabulary_[term] for term in terms], dtype=np.int32),
+            'idf': np.asarray(vectorizer.idf_ if vectorizer.use_idf else [], dtype=np.float64),
+            'stop_words': _encode_terms(stop_words)
+        }
+        config = {
+            'lowercase': vectorizer.lowercase,
+            'token_pattern': vectorizer.token_pattern,
+            'ngram_range': list(vectorizer.ngram_range),
+            'norm': vectorizer.norm,
+            'use_idf': vectorizer.use_idf,
+            'sublinear_tf': vectorizer.sublinear_tf,
+            'binary': vectorizer.binary,
+            'n_features': len(vectorizer.vocabulary_)
+        }
+        return arrays, config
+
+    def _ngrams(self, text):
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_pattern.findall(text)
+        if self.stop_words:
+            tokens = [token for token in tokens if token not in self.stop_words]
+
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        ngrams = tokens if min_n == 1 else []
+        if min_n == 1:
+            min_n = 2
+        for n in range(min_n, min(max_n, len(tokens)) + 1):
+            ngrams = ngrams + [' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+        return ngrams
+
+    def transform(self, texts):
+        """
+        Transform preprocessed texts into a TF-IDF CSR matrix
+        """
+        width = self.terms.dtype.itemsize
+        keys = []
+        rows = []
+        for row, text in enumerate(texts):
+            for ngram in self._ngrams(text):
+                encoded = ngram.encode('utf-8')
+                # Longer n-grams cannot be in the vocabulary and would be
+                # truncated by the fixed-width array
+                if len(encoded) <= width:
+                    keys.append(encoded)
+                    rows.append(row)
+
+        n_rows = len(texts)
+        if keys:
+            keys = np.array(keys, dtype=self.terms.dtype)
+            positions = np.searchsorted(self.terms, keys)
+            positions[positions == len(self.terms)] = 0
+            found = self.terms[positions] == keys
+            columns = self.term_columns[positions[found]]
+            rows = np.asarray(rows, dtype=np.int32)[found]
+        else:
+            columns = rows = np.zeros(0, dtype=np.int32)
+
+        X = sp.csr_matrix((np.ones(len(columns)), (rows, columns)),
+                          shape=(n_rows, self.n_features), dtype=np.float64)
+        X.sum_duplicates()
+
+        if self.binary:
+            X.data[:] = 1
+        if self.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1
+        if self.use_idf:
+            idf = self.idf[X.indices]
+            if self.idf_scale is not None:
+                idf = idf * self.idf_scale + self.idf_offset
+            X.data *= idf
+        if self.norm is not None:
+            if self.norm == 'l2':
+                row_norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+            else:
+                row_norms = np.asarray(abs(X).sum(axis=1)).ravel()
+            row_norms[row_norms == 0] = 1
+            X.data /= np.repeat(row_norms, np.diff(X.indptr))
+        return X
+
+def export_artifact(model, vectorizer, path, dtype='float64'):
+    """
+    Export a fitted model and TfidfVectorizer to a single mmap-able artifact
+
+    dtype sets how coefficients and idf weights are stored: float64 (exact),
+    float32, or int8 with a per-row scale and offset.
+    """
+    scorer = LinearScorer.from_estimator(model)
+    arrays, config = CompactVectorizer.export(vectorizer)
+    idf = arrays.pop('idf')
+    if len(idf):
+        arrays.update(_weight_arrays('idf', idf, dtype))
+    else:
+        arrays['idf'] = idf
+    arrays.update(_weight_arrays('coef', scorer.coef, dtype))
+    arrays.update({
+        'intercept': np.asarray(scorer.intercept, dtype=np.float64),
+        'classes': np.asarray(scorer.classes_)
+    })
+    meta = {'vectorizer': config, 'scorer': {'kind': scorer.kind}, 'dtype': dtype}
+    write_arrays(path, arrays, meta)
+    print(f"Artifact saved to: {path}")
+
+def load_artifact(path, mmap=True):
+    """
+    Load an artifact written by export_artifact as (scorer, vectorizer)
+    """
+    arrays, meta = read_arrays(path, mmap=mmap)
+    vectorizer = CompactVectorizer(arrays['terms'], arrays['term_columns'], arrays['idf'],
+                                   arrays['stop_words'], meta['vectorizer'],
+                                   idf_scale=arrays.get('idf_scale'), idf_offset=arrays.get('idf_offset'))
+    scorer = LinearScorer(meta['scorer']['kind'], arrays['coef'], arrays['intercept'], arrays['classes'],
+                          coef_scale=arrays.get('coef_scale'), coef_offset=arrays.get('coef_offset'))
+    return scorer, vectorizer
+
+if __name__ == "__main__":
+    import argparse
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export a pickled model to a compact artifact")
+    parser.add_argument('model_path')
+    parser.add_argument('vectorizer_path')
+    parser.add_argument('output_path')
+    parser.add_argument('--dtype', choices=WEIGHT_DTYPES, default='float64',
+                        help="Storage type for coefficients and idf weights")
+    args = parser.parse_args()
+
+    export_artifact(joblib.load(args.model_path), joblib.load(args.vectorizer_path), args.output_path,
+                    dtype=args.dtype)
@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class MicroBatcher:
+    """
+    Coalesces single-message requests into batched SpamClassifier calls
+
+    submit() returns a Future immediately. A background thread waits for the
+    first pending message, then keeps collecting until max_batch_size
+    messages are queued or max_wait_ms has passed, scores them with one
+    classify_batch() call and resolves every caller's future with
+    (label, spam_probability).
+    """
+    def __init__(self, classifier, max_batch_size=64, max_wait_ms=2.0):
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.messages = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='spam-microbatcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, email_text):
+        """
+        Queue one message for scoring and return a Future for its result
+        """
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((email_text, future))
+        return future
+
+    def classify(self, email_text, timeout=None):
+        """
+        Score one message through the batcher and wait for the result
+        """
+        return self.submit(email_text).result(timeout)
+
+    def _collect(self):
+        item = self._queue.get()
+        if item is None:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish the current batch, then stop on the next collect
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            texts = [text for text, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                labels, spam_probabilities = self.classifier.classify_batch(texts)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.messages += len(batch)
+            for i, future in enumerate(futures):
+                probability = float(spam_probabilities[i]) if spam_probabilities is not None else None
+                future.set_result((str(labels[i]), probability))
+
+    def stats(self):
+        """
+        Return batch counters as a dictionary
+        """
+        return {
+            'batches': self.batches,
+            'messages': self.messages,
+            'mean_batch_size': self.messages / self.batches if self.batches else 0.0,
+            'pending': self._queue.qsize()
+        }
+
+    def close(self):
+        """
+        Stop the background thread after scoring everything already queued
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+            # Fail anything that raced with close() instead of leaving it hanging
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[1].set_exception(RuntimeError("MicroBatcher is closed"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
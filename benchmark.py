@@ -0,0 +1,575 @@
+import argparse
+import json
+import platform
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import os
+import sys
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+
+# Add src to path so we can import our modules
+sys.path.append(os.path.dirname(__file__))
+
+from artifact import export_artifact, load_artifact
+from batching import MicroBatcher
+from preprocess import TextPreprocessor, preprocess_text
+from predict import SpamClassifier
+from utils import load_dataset
+import app_final
+from app_final import SpamDetector
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, 'spam.csv')
+MODEL_PATH = os.path.join(BASE_DIR, 'best_spam_classifier.pkl')
+VECTORIZER_PATH = os.path.join(BASE_DIR, 'spam_vectorizer.pkl')
+
+def reference_preprocess_text(text):
+    """
+    Original per-call preprocessing, kept as the baseline for benchmarks
+    """
+    from nltk.corpus import stopwords
+    from nltk.stem import PorterStemmer
+
+    text = text.lower()
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    words = text.split()
+    stop_words = set(stopwords.words('english'))
+    words = [word for word in words if word not in stop_words]
+    stemmer = PorterStemmer()
+    words = [stemmer.stem(word) for word in words]
+    return ' '.join(words)
+
+def amplify_texts(texts, n_rows, seed=42):
+    """
+    Scale a corpus to n_rows by resampling messages with light mutations
+    (a random number, shuffled casing) so copies are not byte-identical
+    """
+    if n_rows <= len(texts):
+        return list(texts[:n_rows])
+
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(texts), size=n_rows)
+    numbers = rng.integers(0, 100000, size=n_rows)
+    mutations = rng.integers(0, 3, size=n_rows)
+
+    amplified = []
+    for text_index, number, mutation in zip(picks, numbers, mutations):
+        text = texts[text_index]
+        if mutation == 1:
+            text = f"{text} {number}"
+        elif mutation == 2:
+            text = text.upper()
+        amplified.append(text)
+    return amplified
+
+def latency_percentiles(samples):
+    """
+    Summarize latency samples (seconds) as p50/p95/p99 in microseconds
+    """
+    samples = np.asarray(samples) * 1e6
+    return {
+        'p50_us': float(np.percentile(samples, 50)),
+        'p95_us': float(np.percentile(samples, 95)),
+        'p99_us': float(np.percentile(samples, 99))
+    }
+
+def benchmark_preprocessing(texts):
+    """
+    Compare the original preprocess_text against TextPreprocessor
+    """
+    start = time.perf_counter()
+    before = [reference_preprocess_text(text) for text in texts]
+    before_seconds = time.perf_counter() - start
+
+    preprocessor = TextPreprocessor()
+    start = time.perf_counter()
+    after = [preprocessor(text) for text in texts]
+    after_seconds = time.perf_counter() - start
+
+    assert before == after
+    cache_info = preprocessor.cache_info()
+
+    results = {
+        'messages': len(texts),
+        'before_msgs_per_sec': len(texts) / before_seconds,
+        'after_msgs_per_sec': len(texts) / after_seconds,
+        'speedup': before_seconds / after_seconds,
+        'stem_cache_hit_rate': cache_info.hits / max(1, cache_info.hits + cache_info.misses)
+    }
+
+    print(f"\n⏱️  Preprocessing ({results['messages']} messages)")
+    print(f"   Before: {results['before_msgs_per_sec']:.0f} msgs/sec")
+    print(f"   After:  {results['after_msgs_per_sec']:.0f} msgs/sec")
+    print(f"   Speedup: {results['speedup']:.2f}x (stem cache hit rate {results['stem_cache_hit_rate']:.1%})")
+
+    return results
+
+def reference_keyword_scores(detector, message):
+    """
+    Original per-keyword substring scan from SpamDetector.predict
+    """
+    message_lower = message.lower()
+    spam_score = 0
+    for keyword in detector.spam_keywords:
+        if keyword in message_lower:
+            spam_score += 1
+            if keyword in ['$', '£', '€', 'money', 'cash', 'dollar']:
+                spam_score += 1
+    ham_score = 0
+    for keyword in detector.ham_keywords:
+        if keyword in message_lower:
+            ham_score += 1
+    return spam_score, ham_score
+
+def benchmark_keyword_scoring(texts):
+    """
+    Compare the per-keyword scan against SpamDetector's single-pass matcher
+    """
+    detector = SpamDetector()
+
+    start = time.perf_counter()
+    before = [reference_keyword_scores(detector, text) for text in texts]
+    before_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    after = []
+    for text in texts:
+        hits = detector.matcher.find(text.lower())
+        after.append((sum(detector.spam_weights.get(k, 0) for k in hits),
+                      sum(detector.ham_weights.get(k, 0) for k in hits)))
+    after_seconds = time.perf_counter() - start
+
+    assert before == after
+
+    results = {
+        'messages': len(texts),
+        'before_msgs_per_sec': len(texts) / before_seconds,
+        'after_msgs_per_sec': len(texts) / after_seconds,
+        'speedup': before_seconds / after_seconds
+    }
+
+    print(f"\n⏱️  Keyword scoring ({results['messages']} messages)")
+    print(f"   Per-keyword scan: {results['before_msgs_per_sec']:.0f} msgs/sec")
+    print(f"   Single pass:      {results['after_msgs_per_sec']:.0f} msgs/sec")
+    print(f"   Speedup: {results['speedup']:.2f}x")
+
+    return results
+
+def benchmark_cold_start(model_path, vectorizer_path, artifact_path, repeats=20):
+    """
+    Compare unpickling the model and vectorizer against loading the compact artifact
+    """
+    export_artifact(joblib.load(model_path), joblib.load(vectorizer_path), artifact_path)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        joblib.load(model_path)
+        joblib.load(vectorizer_path)
+    pickle_ms = (time.perf_counter() - start) / repeats * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        load_artifact(artifact_path)
+    artifact_ms = (time.perf_counter() - start) / repeats * 1000
+
+    results = {
+        'pickle_load_ms': pickle_ms,
+        'artifact_load_ms': artifact_ms,
+        'speedup': pickle_ms / artifact_ms
+    }
+
+    print(f"\n⏱️  Cold start")
+    print(f"   joblib pickles:   {results['pickle_load_ms']:.2f} ms")
+    print(f"   compact artifact: {results['artifact_load_ms']:.2f} ms")
+    print(f"   Speedup: {results['speedup']:.2f}x")
+
+    return results
+
+# Statements timed in a fresh interpreter by benchmark_import_time
+IMPORT_TARGETS = {
+    'preprocess': 'import preprocess',
+    'preprocess_first_call': 'import preprocess; preprocess.preprocess_text("hello")',
+    'predict': 'import predict',
+    'app_final': 'import app_final'
+}
+
+# Heavy packages the inference import path should not load
+DEFERRED_PACKAGES = ('nltk', 'matplotlib', 'pandas')
+
+def benchmark_import_time(repeats=5):
+    """
+    Wall time of importing the inference modules in a fresh interpreter,
+    net of interpreter startup, and which heavy packages each one loads
+
+    app_final includes loading the default model; preprocess_first_call
+    includes building the stemmer, the first point NLTK is imported.
+    """
+    def run(statement):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', statement], cwd=BASE_DIR, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append(time.perf_counter() - start)
+        return float(np.median(timings)) * 1000
+
+    interpreter_ms = run('pass')
+    results = {'interpreter_ms': interpreter_ms}
+    print(f"\n⏱️  Import time (median of {repeats}, net of {interpreter_ms:.0f} ms interpreter startup)")
+    for name, statement in IMPORT_TARGETS.items():
+        check = f"{statement}; import sys; print('loaded:', *(p for p in {DEFERRED_PACKAGES!r} if p in sys.modules))"
+        output = subprocess.run([sys.executable, '-c', check], cwd=BASE_DIR, check=True, text=True,
+                                capture_output=True).stdout
+        loaded = output[output.rindex('loaded:'):].split()[1:]
+        results[name] = {'import_ms': run(statement) - interpreter_ms, 'loaded': loaded}
+        print(f"   {name:<22} {results[name]['import_ms']:7.0f} ms  "
+              f"loads: {', '.join(loaded) if loaded else 'none of ' + '/'.join(DEFERRED_PACKAGES)}")
+
+    return results
+
+def benchmark_fast_path(texts, repeats=3):
+    """
+    Compare single-message sklearn predict_proba latency against LinearScorer
+    """
+    sklearn_classifier = SpamClassifier(MODEL_PATH, VECTORIZER_PATH)
+    fast_classifier = SpamClassifier(MODEL_PATH, VECTORIZER_PATH, fast_path=True)
+
+    # Time the model call alone, on already vectorized rows
+    rows = [sklearn_classifier.vectorizer.transform([preprocess_text(text)]) for text in texts]
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        sklearn_scores = [sklearn_classifier.model.predict_proba(row) for row in rows]
+    sklearn_us = (time.perf_counter() - start) / (repeats * len(rows)) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fast_scores = [fast_classifier.model.predict_proba(row) for row in rows]
+    fast_us = (time.perf_counter() - start) / (repeats * len(rows)) * 1e6
+
+    max_difference = max(float(np.abs(a - b).max()) for a, b in zip(sklearn_scores, fast_scores))
+    assert max_difference < 1e-9
+
+    results = {
+        'messages': len(texts),
+        'sklearn_us_per_message': sklearn_us,
+        'fast_path_us_per_message': fast_us,
+        'speedup': sklearn_us / fast_us,
+        'max_probability_difference': max_difference
+    }
+
+    print(f"\n⏱️  Single-message inference ({results['messages']} messages)")
+    print(f"   sklearn predict_proba: {results['sklearn_us_per_message']:.1f} µs/msg")
+    print(f"   LinearScorer:          {results['fast_path_us_per_message']:.1f} µs/msg")
+    print(f"   Speedup: {results['speedup']:.2f}x (max difference {max_difference:.1e})")
+
+    return results
+
+def benchmark_batch_prediction(classifier, texts):
+    """
+    Compare per-message predict() throughput against predict_batch()
+    """
+    start = time.perf_counter()
+    loop_predictions = [classifier.predict(text) for text in texts]
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_predictions = classifier.predict_batch(texts)
+    batch_seconds = time.perf_counter() - start
+
+    assert list(batch_predictions) == loop_predictions
+
+    results = {
+        'messages': len(texts),
+        'loop_msgs_per_sec': len(texts) / loop_seconds,
+        'batch_msgs_per_sec': len(texts) / batch_seconds,
+        'speedup': loop_seconds / batch_seconds
+    }
+
+    print(f"\n⏱️  Batch prediction ({results['messages']} messages)")
+    print(f"   Per-message loop: {results['loop_msgs_per_sec']:.0f} msgs/sec")
+    print(f"   predict_batch:    {results['batch_msgs_per_sec']:.0f} msgs/sec")
+    print(f"   Speedup:          {results['speedup']:.2f}x")
+
+    return results
+
+def benchmark_vectorizer_transform(classifier, texts, batch_size=1000):
+    """
+    Throughput of TfidfVectorizer.transform on preprocessed text
+    """
+    cleaned_texts = [preprocess_text(text) for text in texts]
+
+    start = time.perf_counter()
+    for i in range(0, len(cleaned_texts), batch_size):
+        classifier.vectorizer.transform(cleaned_texts[i:i + batch_size])
+    seconds = time.perf_counter() - start
+
+    results = {
+        'messages': len(texts),
+        'batch_size': batch_size,
+        'transform_msgs_per_sec': len(texts) / seconds
+    }
+
+    print(f"\n⏱️  Vectorizer transform ({results['messages']} messages)")
+    print(f"   {results['transform_msgs_per_sec']:.0f} msgs/sec")
+
+    return results
+
+def benchmark_classifier_latency(classifier, texts, batch_sizes=(1, 32, 256)):
+    """
+    Latency percentiles of single predict() calls and predict_batch() calls
+    """
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        classifier.predict(text)
+        samples.append(time.perf_counter() - start)
+    results = {'messages': len(texts), 'single': latency_percentiles(samples)}
+
+    for batch_size in batch_sizes:
+        samples = []
+        for i in range(0, len(texts) - batch_size + 1, batch_size):
+            batch = texts[i:i + batch_size]
+            start = time.perf_counter()
+            classifier.predict_batch(batch)
+            samples.append(time.perf_counter() - start)
+        if samples:
+            stats = latency_percentiles(samples)
+            stats['msgs_per_sec'] = batch_size * len(samples) / (sum(samples) or 1e-12)
+            results[f'batch_{batch_size}'] = stats
+
+    print(f"\n⏱️  SpamClassifier latency ({results['messages']} messages)")
+    for name, stats in results.items():
+        if isinstance(stats, dict):
+            print(f"   {name:<10} p50={stats['p50_us']:.0f}µs p95={stats['p95_us']:.0f}µs p99={stats['p99_us']:.0f}µs")
+
+    return results
+
+def benchmark_detector(texts):
+    """
+    Throughput of the rule-based SpamDetector.predict
+    """
+    detector = SpamDetector()
+
+    start = time.perf_counter()
+    for text in texts:
+        detector.predict(text)
+    seconds = time.perf_counter() - start
+
+    results = {
+        'messages': len(texts),
+        'predict_msgs_per_sec': len(texts) / seconds
+    }
+
+    print(f"\n⏱️  SpamDetector.predict ({results['messages']} messages)")
+    print(f"   {results['predict_msgs_per_sec']:.0f} msgs/sec")
+
+    return results
+
+def benchmark_http(texts, api_batch_size=100):
+    """
+    Requests/sec of the Flask /predict form route and the batched JSON API
+    through the test client
+    """
+    client = app_final.app.test_client()
+
+    start = time.perf_counter()
+    for text in texts:
+        client.post('/predict', data={'message': text})
+    predict_seconds = time.perf_counter() - start
+
+    batches = [texts[i:i + api_batch_size] for i in range(0, len(texts), api_batch_size)]
+    start = time.perf_counter()
+    for batch in batches:
+        client.post('/api/v1/classify', json=batch)
+    api_seconds = time.perf_counter() - start
+
+    results = {
+        'messages': len(texts),
+        'predict_requests_per_sec': len(texts) / predict_seconds,
+        'api_requests_per_sec': len(batches) / api_seconds,
+        'api_msgs_per_sec': len(texts) / api_seconds,
+        'api_batch_size': api_batch_size
+    }
+
+    print(f"\n⏱️  HTTP serving ({results['messages']} messages)")
+    print(f"   /predict:         {results['predict_requests_per_sec']:.0f} requests/sec")
+    print(f"   /api/v1/classify: {results['api_requests_per_sec']:.0f} requests/sec "
+          f"({results['api_msgs_per_sec']:.0f} msgs/sec)")
+
+    return results
+
+def _concurrent_latencies(score, texts, concurrency):
+    """
+    Score texts from `concurrency` threads, returning (seconds, latencies)
+    """
+    shards = [texts[i::concurrency] for i in range(concurrency)]
+    latencies = [[] for _ in shards]
+
+    def worker(shard, samples):
+        for text in shard:
+            start = time.perf_counter()
+            score(text)
+            samples.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(shard, samples))
+               for shard, samples in zip(shards, latencies)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    return seconds, [sample for samples in latencies for sample in samples]
+
+def benchmark_microbatching(classifier, texts, concurrency=16,
+                            settings=((8, 1.0), (32, 2.0), (64, 5.0))):
+    """
+    Throughput and latency of concurrent single-message requests scored
+    directly versus through MicroBatcher with several (batch size, wait) knobs
+    """
+    seconds, samples = _concurrent_latencies(
+        lambda text: classifier.classify_batch([text]), texts, concurrency)
+    results = {
+        'messages': len(texts),
+        'concurrency': concurrency,
+        'direct': dict(latency_percentiles(samples), msgs_per_sec=len(texts) / seconds)
+    }
+
+    for max_batch_size, max_wait_ms in settings:
+        with MicroBatcher(classifier, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms) as batcher:
+            seconds, samples = _concurrent_latencies(batcher.classify, texts, concurrency)
+            stats = batcher.stats()
+        results[f'batch_{max_batch_size}_wait_{max_wait_ms:g}ms'] = dict(
+            latency_percentiles(samples), msgs_per_sec=len(texts) / seconds,
+            mean_batch_size=stats['mean_batch_size'])
+
+    print(f"\n⏱️  Micro-batching ({results['messages']} messages, {concurrency} threads)")
+    for name, stats in results.items():
+        if isinstance(stats, dict):
+            print(f"   {name:<22} {stats['msgs_per_sec']:.0f} msgs/sec "
+                  f"p50={stats['p50_us']:.0f}µs p99={stats['p99_us']:.0f}µs")
+
+    return results
+
+def _flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + '.'))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+def compare_results(baseline, current, tolerance=0.1):
+    """
+    Return metrics that regressed by more than tolerance between two runs
+
+    Metrics ending in _per_sec or named speedup are higher-is-better; those
+    ending in _us or _ms are lower-is-better. Others are ignored.
+    """
+    baseline = _flatten(baseline.get('benchmarks', {}))
+    current = _flatten(current.get('benchmarks', {}))
+
+    regressions = []
+    for name, value in current.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        if name.endswith('_per_sec') or name.endswith('speedup'):
+            change = (old - value) / old
+        elif name.endswith('_us') or name.endswith('_ms'):
+            change = (value - old) / old
+        else:
+            continue
+        if change > tolerance:
+            regressions.append({'metric': name, 'baseline': old, 'current': value, 'regression': change})
+    return regressions
+
+BENCHMARKS = ['preprocessing', 'keyword_scoring', 'detector', 'vectorizer_transform', 'cold_start',
+              'import_time', 'fast_path', 'batch_prediction', 'classifier_latency', 'microbatching', 'http']
+
+def run_suite(texts, selected=None, latency_samples=2000):
+    """
+    Run the selected benchmarks (all by default) and return their results
+    """
+    latency_texts = texts[:latency_samples]
+    classifier = SpamClassifier(MODEL_PATH, VECTORIZER_PATH)
+
+    def _cold_start():
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            return benchmark_cold_start(MODEL_PATH, VECTORIZER_PATH, os.path.join(tmp_dir, 'model.spamart'))
+
+    suite = {
+        'preprocessing': lambda: benchmark_preprocessing(texts),
+        'keyword_scoring': lambda: benchmark_keyword_scoring(texts),
+        'detector': lambda: benchmark_detector(texts),
+        'vectorizer_transform': lambda: benchmark_vectorizer_transform(classifier, texts),
+        'cold_start': _cold_start,
+        'import_time': benchmark_import_time,
+        'fast_path': lambda: benchmark_fast_path(latency_texts),
+        'batch_prediction': lambda: benchmark_batch_prediction(classifier, latency_texts),
+        'classifier_latency': lambda: benchmark_classifier_latency(classifier, latency_texts),
+        'microbatching': lambda: benchmark_microbatching(classifier, latency_texts),
+        'http': lambda: benchmark_http(latency_texts)
+    }
+
+    results = {}
+    for name, benchmark in suite.items():
+        if selected is None or name in selected:
+            results[name] = benchmark()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Spam classifier benchmark suite")
+    parser.add_argument('--data', default=DATA_PATH, help="Dataset to benchmark on")
+    parser.add_argument('--rows', type=int, default=0,
+                        help="Amplify the dataset to this many rows (0 = use as is)")
+    parser.add_argument('--latency-samples', type=int, default=2000,
+                        help="Messages used by the per-message latency benchmarks")
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, help="Benchmarks to run")
+    parser.add_argument('--output', help="Write JSON results to this path")
+    parser.add_argument('--compare', help="Baseline JSON results to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help="Allowed relative regression before failing --compare")
+    args = parser.parse_args()
+
+    df = load_dataset(args.data)
+    if df is None:
+        sys.exit(1)
+
+    texts = df['text'].tolist()
+    if args.rows:
+        texts = amplify_texts(texts, args.rows)
+
+    results = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'rows': len(texts),
+        'benchmarks': run_suite(texts, args.only, args.latency_samples)
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions over {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"   {regression['metric']}: {regression['baseline']:.2f} -> "
+                      f"{regression['current']:.2f} ({regression['regression']:.1%})")
+            sys.exit(1)
+        print(f"\n✅ No regressions over {args.tolerance:.0%}")
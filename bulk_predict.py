@@ -0,0 +1,213 @@
+import argparse
+import csv
+import json
+import time
+import os
+import sys
+from collections import deque
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# Add src to path so we can import our modules
+sys.path.append(os.path.dirname(__file__))
+
+from predict import SpamClassifier
+
+def _text_column(columns):
+    """
+    Pick the message column using the same layouts load_dataset recognizes
+    """
+    columns = list(columns)
+    if 'v1' in columns and 'v2' in columns:
+        return 'v2'
+    if 'Label' in columns and 'EmailText' in columns:
+        return 'EmailText'
+    if 'text' in columns:
+        return 'text'
+    # Otherwise (label, text) in the first two columns, or a bare text column
+    return columns[1] if len(columns) > 1 else columns[0]
+
+def iter_csv_chunks(path, chunk_size, start_row=0):
+    """
+    Yield (first_row, texts) chunks from a CSV file, skipping start_row rows
+    """
+    reader = pd.read_csv(path, encoding='latin-1', chunksize=chunk_size,
+                         skiprows=range(1, start_row + 1), dtype=str, keep_default_na=False)
+    row = start_row
+    column = None
+    for chunk in reader:
+        if column is None:
+            column = _text_column(chunk.columns)
+        texts = chunk[column].tolist()
+        if not texts:
+            continue
+        yield row, texts
+        row += len(texts)
+
+def iter_jsonl_chunks(path, chunk_size, start_row=0):
+    """
+    Yield (first_row, texts) chunks from a JSONL file, skipping start_row rows
+
+    Blank lines are not records and do not count as rows.
+    """
+    row = start_row
+    texts = []
+    column = None
+    records = 0
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            records += 1
+            if records <= start_row:
+                continue
+            record = json.loads(line)
+            if column is None:
+                column = _text_column(record.keys())
+            texts.append(str(record.get(column, '')))
+            if len(texts) == chunk_size:
+                yield row, texts
+                row += len(texts)
+                texts = []
+    if texts:
+        yield row, texts
+
+_worker_classifier = None
+
+def _init_worker(model_path, vectorizer_path):
+    """
+    Load the classifier once per worker process
+    """
+    global _worker_classifier
+    _worker_classifier = SpamClassifier(model_path, vectorizer_path)
+
+def _score_chunk(first_row, texts):
+    """
+    Preprocess, vectorize and score one chunk inside a worker
+    """
+    labels, spam_probabilities = _worker_classifier.classify_batch(texts)
+    if spam_probabilities is None:
+        spam_probabilities = [''] * len(texts)
+    return first_row, list(labels), list(spam_probabilities)
+
+def count_output_rows(output_path):
+    """
+    Number of predictions already written to output_path (for resuming)
+
+    Only newline-terminated rows count, so a row cut off by a crash is
+    scored again.
+    """
+    if not os.path.exists(output_path):
+        return 0
+    lines = 0
+    with open(output_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            lines += block.count(b'\n')
+    return max(0, lines - 1)
+
+def truncate_partial_row(output_path):
+    """
+    Cut a final row left without its newline by an interrupted run
+    """
+    with open(output_path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            block_start = max(0, position - (1 << 16))
+            f.seek(block_start)
+            block = f.read(position - block_start)
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                position = block_start + newline + 1
+                break
+            position = block_start
+        if position < end:
+            f.truncate(position)
+
+def bulk_predict(input_path, output_path, model_path, vectorizer_path=None, chunk_size=10000,
+                 n_workers=1, start_row=None, progress_every=1):
+    """
+    Stream input_path through the classifier, appending predictions to output_path
+
+    Chunks are scored by a process pool with at most 2 * n_workers chunks in
+    flight, and written in input order as soon as they complete, so memory
+    stays bounded by the chunk size. With start_row=None the run resumes
+    after the rows already present in output_path, and does nothing if no
+    input rows remain.
+    """
+    if start_row is None:
+        start_row = count_output_rows(output_path)
+    reader = iter_jsonl_chunks if input_path.endswith(('.jsonl', '.ndjson')) else iter_csv_chunks
+    chunks = reader(input_path, chunk_size, start_row)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        print(f"✅ Nothing to score: {input_path} has no rows after row {start_row}")
+        return 0
+    chunks = chain([first_chunk], chunks)
+
+    resume = start_row > 0 and os.path.exists(output_path)
+    if resume:
+        truncate_partial_row(output_path)
+    output = open(output_path, 'a' if resume else 'w', newline='', encoding='utf-8')
+    writer = csv.writer(output)
+    if not resume:
+        writer.writerow(['row', 'label', 'spam_probability'])
+
+    print(f"🚀 Scoring {input_path} from row {start_row} with {n_workers} workers...")
+    rows = 0
+    written_chunks = 0
+    start = time.perf_counter()
+
+    def write(result):
+        nonlocal rows, written_chunks
+        first_row, labels, spam_probabilities = result
+        writer.writerows(zip(range(first_row, first_row + len(labels)), labels, spam_probabilities))
+        output.flush()
+        rows += len(labels)
+        written_chunks += 1
+        if written_chunks % progress_every == 0:
+            elapsed = time.perf_counter() - start
+            print(f"   {first_row + len(labels)} rows done, {rows / elapsed:.0f} rows/sec")
+
+    try:
+        if n_workers <= 1:
+            _init_worker(model_path, vectorizer_path)
+            for first_row, texts in chunks:
+                write(_score_chunk(first_row, texts))
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                     initargs=(model_path, vectorizer_path)) as executor:
+                pending = deque()
+                for first_row, texts in chunks:
+                    pending.append(executor.submit(_score_chunk, first_row, texts))
+                    if len(pending) >= 2 * n_workers:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    finally:
+        output.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"\n🎯 Scored {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/sec)")
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-classify a CSV or JSONL message file")
+    parser.add_argument('input_path', help="CSV or JSONL (.jsonl/.ndjson) file of messages")
+    parser.add_argument('output_path', help="CSV file to write predictions to")
+    parser.add_argument('--model', required=True, help="Model pickle or compact artifact")
+    parser.add_argument('--vectorizer', help="Vectorizer pickle (omit for compact artifacts)")
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Scoring worker processes (0 = all cores)")
+    parser.add_argument('--start-row', type=int,
+                        help="Input row to start from (default: resume after existing output)")
+    parser.add_argument('--progress-every', type=int, default=1,
+                        help="Report rows/sec every N chunks")
+    args = parser.parse_args()
+
+    bulk_predict(args.input_path, args.output_path, args.model, args.vectorizer,
+                 chunk_size=args.chunk_size, n_workers=args.workers or os.cpu_count() or 1,
+                 start_row=args.start_row, progress_every=args.progress_every)
@@ -0,0 +1,352 @@
+import argparse
+import re
+import threading
+import time
+import os
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+# Add src to path so we can import our modules
+sys.path.append(os.path.dirname(__file__))
+
+from cache import text_key
+from keywords import KeywordMatcher, keyword_weights
+
+# Digits collapse to one placeholder and punctuation to spaces, so campaign
+# variants that only differ in phone numbers, amounts or codes share a template
+_DIGITS = re.compile(r'\d+')
+_NON_WORD = re.compile(r'[^a-z0-9£$€]+')
+_LETTER = re.compile(r'[a-z]')
+
+def template_text(message):
+    """
+    Normalized form of a message used to recognise repeated templates
+    """
+    return _NON_WORD.sub(' ', _DIGITS.sub('0', message.lower())).strip()
+
+class KnownTemplates:
+    """
+    Hash set of message templates with a consistent known label
+
+    Only templates seen at least min_count times, always with the same label,
+    are kept; each is stored as a 16-byte hash of its normalized text.
+    Templates without letters (emoji, punctuation, bare codes or numbers)
+    are never known, so such messages always reach the model.
+    """
+    def __init__(self, spam_hashes=(), ham_hashes=()):
+        self.spam_hashes = set(spam_hashes)
+        self.ham_hashes = set(ham_hashes)
+
+    @classmethod
+    def from_labeled(cls, texts, labels, min_count=2):
+        """
+        Collect templates from labeled messages (label 1 = spam)
+        """
+        seen = defaultdict(lambda: [0, 0])
+        for text, label in zip(texts, labels):
+            template = template_text(text)
+            if _LETTER.search(template):
+                seen[text_key(template)][int(label)] += 1
+
+        spam_hashes, ham_hashes = [], []
+        for key, (ham_count, spam_count) in seen.items():
+            if spam_count >= min_count and ham_count == 0:
+                spam_hashes.append(key)
+            elif ham_count >= min_count and spam_count == 0:
+                ham_hashes.append(key)
+        return cls(spam_hashes, ham_hashes)
+
+    def save(self, path):
+        # Plain sets of bytes, so loading does not depend on this module's path
+        import joblib
+
+        joblib.dump({'spam': self.spam_hashes, 'ham': self.ham_hashes}, path)
+
+    @classmethod
+    def load(cls, path):
+        import joblib
+
+        hashes = joblib.load(path)
+        return cls(hashes['spam'], hashes['ham'])
+
+    def lookup(self, messages):
+        """
+        Per-message decision: 1 = known spam, 0 = known ham, -1 = unknown
+        """
+        decisions = []
+        for message in messages:
+            template = template_text(message)
+            if not _LETTER.search(template):
+                decisions.append(-1)
+                continue
+            key = text_key(template)
+            decisions.append(1 if key in self.spam_hashes else 0 if key in self.ham_hashes else -1)
+        return decisions
+
+    def __len__(self):
+        return len(self.spam_hashes) + len(self.ham_hashes)
+
+class CascadeClassifier:
+    """
+    Two-stage classifier: known templates and keyword rules first, the ML
+    model only for messages the cheap stage is unsure about
+
+    A message is decided without the model when its template is known, when
+    it has no spam keywords and at least ham_min_score ham keyword weight, or
+    when its spam keyword weight is at least spam_min_score and makes up at
+    least spam_min_ratio of all keyword weight. Ham keywords only count as
+    whole words ('hi' does not match 'this'); spam keywords match anywhere,
+    as in SpamDetector. Everything else goes to the wrapped classifier (a
+    SpamClassifier or HotReloader) in one batch call. Short-circuited
+    messages get a spam probability of exactly 1.0 or 0.0.
+
+    The first stage costs tens of microseconds per message in Python, while
+    the model's vectorized batch path costs less than that per message, so
+    batches larger than max_batch_size (None = no limit) go straight to the
+    model; `cascade.py evaluate` reports the trade-off per batch size.
+
+    The predict* and classify_batch methods go through the cascade. Any
+    other attribute (model, vectorizer, load, cache_stats, ...) is forwarded
+    to the wrapped classifier and bypasses it.
+    """
+    def __init__(self, classifier, templates=None, ham_min_score=1, spam_min_score=8,
+                 spam_min_ratio=0.7, max_batch_size=1):
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.templates = templates
+        self.ham_min_score = ham_min_score
+        self.spam_min_score = spam_min_score
+        self.spam_min_ratio = spam_min_ratio
+        self.spam_weights, self.ham_weights = keyword_weights()
+        self.spam_matcher = KeywordMatcher(list(self.spam_weights))
+        self.ham_matcher = KeywordMatcher(list(self.ham_weights), whole_words=True)
+        self.counts = {'template': 0, 'rules': 0, 'model': 0}
+        self._lock = threading.Lock()
+
+    def _rule_decision(self, message):
+        message = message.lower()
+        spam_score = sum(self.spam_weights[keyword] for keyword in self.spam_matcher.find(message))
+        ham_score = sum(self.ham_weights[keyword] for keyword in self.ham_matcher.find(message))
+        if spam_score >= self.spam_min_score and spam_score >= self.spam_min_ratio * (spam_score + ham_score):
+            return 1
+        if spam_score == 0 and ham_score >= self.ham_min_score:
+            return 0
+        return -1
+
+    def decide(self, email_texts):
+        """
+        First-stage decision per message as two lists: the label (1 = spam,
+        0 = ham, -1 = uncertain) and the stage that decided it ('template',
+        'rules' or None)
+
+        This runs per message in plain Python: for the single messages and
+        small micro-batches typical of serving, NumPy/SciPy call overhead
+        would cost more than the keyword scan itself.
+        """
+        template_decisions = (self.templates.lookup(email_texts) if self.templates is not None
+                              else [-1] * len(email_texts))
+        decisions = []
+        stages = []
+        for message, decision in zip(email_texts, template_decisions):
+            if decision >= 0:
+                decisions.append(decision)
+                stages.append('template')
+                continue
+            decision = self._rule_decision(message)
+            decisions.append(decision)
+            stages.append('rules' if decision >= 0 else None)
+        return decisions, stages
+
+    def classify_batch(self, email_texts):
+        """
+        Return (labels, spam_probabilities) like SpamClassifier.classify_batch
+        """
+        email_texts = list(email_texts)
+        if self.max_batch_size is not None and len(email_texts) > self.max_batch_size:
+            labels, spam_probabilities = self.classifier.classify_batch(email_texts)
+            with self._lock:
+                self.counts['model'] += len(email_texts)
+            return labels, spam_probabilities
+
+        decisions, stages = self.decide(email_texts)
+        labels = ["Spam" if decision == 1 else "Ham" for decision in decisions]
+        spam_probabilities = [float(decision) for decision in decisions]
+
+        uncertain = [i for i, decision in enumerate(decisions) if decision < 0]
+        if uncertain:
+            model_labels, model_probabilities = self.classifier.classify_batch(
+                [email_texts[i] for i in uncertain])
+            for position, i in enumerate(uncertain):
+                labels[i] = str(model_labels[position])
+            if model_probabilities is None:
+                spam_probabilities = None
+            else:
+                for position, i in enumerate(uncertain):
+                    spam_probabilities[i] = float(model_probabilities[position])
+
+        with self._lock:
+            self.counts['template'] += stages.count('template')
+            self.counts['rules'] += stages.count('rules')
+            self.counts['model'] += len(uncertain)
+
+        return (np.array(labels, dtype='<U4'),
+                np.array(spam_probabilities) if spam_probabilities is not None else None)
+
+    def predict_batch(self, email_texts):
+        """
+        Predict spam or ham for a list of emails
+        """
+        return self.classify_batch(email_texts)[0]
+
+    def predict(self, email_text):
+        """
+        Predict if an email is spam or ham
+        """
+        return str(self.classify_batch([email_text])[0][0])
+
+    def predict_proba_batch(self, email_texts):
+        """
+        Get Ham/Spam probabilities for a list of emails as an (n, 2) array
+        """
+        spam_probabilities = self.classify_batch(email_texts)[1]
+        if spam_probabilities is None:
+            return "Probability not available for this model"
+        return np.column_stack([1 - spam_probabilities, spam_probabilities])
+
+    def predict_probability(self, email_text):
+        """
+        Get prediction probabilities (if model supports it)
+        """
+        probabilities = self.predict_proba_batch([email_text])
+        if isinstance(probabilities, str):
+            return probabilities
+        return {
+            'Ham': probabilities[0, 0],
+            'Spam': probabilities[0, 1]
+        }
+
+    def stats(self):
+        """
+        Messages decided by each stage and the fraction that skipped the model
+        """
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        short_circuited = counts['template'] + counts['rules']
+        return dict(counts, total=total,
+                    short_circuit_ratio=short_circuited / total if total else 0.0)
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on the cascade itself
+        if name == 'classifier':
+            raise AttributeError(name)
+        return getattr(self.classifier, name)
+
+def evaluate_cascade(classifier, texts, labels, test_size=0.2, min_count=2, repeats=5,
+                     batch_sizes=(1, 8, 64, 0), **options):
+    """
+    Compare the cascade with the model alone on the held-out split used by
+    train.py; templates are collected from the training split only
+
+    Throughput is measured per batch size (0 = the whole split in one call)
+    with one call per batch, as the HTTP API and micro-batcher see traffic,
+    for the model alone, the cascade with its first stage run on every
+    batch ('forced') and the cascade as configured (first stage only up to
+    max_batch_size). The three alternate within each repeat and the best
+    time is kept, so noise from other processes hits them alike.
+    """
+    from sklearn.model_selection import train_test_split
+
+    train_texts, test_texts, train_labels, test_labels = train_test_split(
+        list(texts), np.asarray(labels), test_size=test_size, random_state=42)
+    templates = KnownTemplates.from_labeled(train_texts, train_labels, min_count=min_count)
+    scorers = {
+        'model': classifier,
+        'forced': CascadeClassifier(classifier, templates, **dict(options, max_batch_size=None)),
+        'cascade': CascadeClassifier(classifier, templates, **options)
+    }
+
+    results = {'messages': len(test_texts), 'templates': len(templates),
+               'max_batch_size': scorers['cascade'].max_batch_size, 'batch_sizes': {}}
+    for name in ('model', 'forced'):
+        labels_predicted = scorers[name].predict_batch(test_texts)
+        results[f'{name}_accuracy'] = float(np.mean((np.asarray(labels_predicted) == 'Spam') == test_labels))
+    results['accuracy_delta'] = results['forced_accuracy'] - results['model_accuracy']
+
+    _, stages = scorers['forced'].decide(test_texts)
+    results['template_ratio'] = stages.count('template') / len(test_texts)
+    results['rules_ratio'] = stages.count('rules') / len(test_texts)
+    results['short_circuit_ratio'] = results['template_ratio'] + results['rules_ratio']
+
+    for batch_size in batch_sizes:
+        size = batch_size or len(test_texts)
+        batches = [test_texts[i:i + size] for i in range(0, len(test_texts), size)]
+        best = dict.fromkeys(scorers, float('inf'))
+        for _ in range(repeats):
+            for name, scorer in scorers.items():
+                start = time.perf_counter()
+                for batch in batches:
+                    scorer.classify_batch(batch)
+                best[name] = min(best[name], time.perf_counter() - start)
+        entry = {f'{name}_msgs_per_sec': len(test_texts) / seconds for name, seconds in best.items()}
+        entry['forced_speedup'] = best['model'] / best['forced']
+        entry['cascade_speedup'] = best['model'] / best['cascade']
+        results['batch_sizes'][size] = entry
+
+    print(f"\n⏱️  Cascade on held-out split ({results['messages']} messages, {results['templates']} templates, "
+          f"first stage up to {results['max_batch_size'] or 'any'} messages per call)")
+    print(f"   Short-circuited: {results['short_circuit_ratio']:.1%} "
+          f"(templates {results['template_ratio']:.1%}, rules {results['rules_ratio']:.1%})")
+    print(f"   Accuracy: model {results['model_accuracy']:.4f}, cascade {results['forced_accuracy']:.4f} "
+          f"(delta {results['accuracy_delta']:+.4f})")
+    for size, entry in results['batch_sizes'].items():
+        print(f"   batch {size:>5}: model {entry['model_msgs_per_sec']:.0f} msgs/sec, "
+              f"forced {entry['forced_msgs_per_sec']:.0f} ({entry['forced_speedup']:.2f}x), "
+              f"cascade {entry['cascade_msgs_per_sec']:.0f} ({entry['cascade_speedup']:.2f}x)")
+
+    return results
+
+if __name__ == "__main__":
+    from predict import SpamClassifier
+    from utils import load_dataset
+
+    parser = argparse.ArgumentParser(description="Rule/template cascade in front of the spam model")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Collect known templates from a labeled CSV")
+    build_parser.add_argument('data_path')
+    build_parser.add_argument('output_path')
+    build_parser.add_argument('--min-count', type=int, default=2,
+                              help="Times a template must be seen, always with one label")
+
+    evaluate_parser = subparsers.add_parser('evaluate', help="Report short-circuit rate, speedup and accuracy")
+    evaluate_parser.add_argument('data_path')
+    evaluate_parser.add_argument('model_path')
+    evaluate_parser.add_argument('vectorizer_path', nargs='?',
+                                 help="Vectorizer pickle (omit for compact artifacts)")
+    evaluate_parser.add_argument('--min-count', type=int, default=2)
+    evaluate_parser.add_argument('--ham-min-score', type=float, default=1)
+    evaluate_parser.add_argument('--spam-min-score', type=float, default=8)
+    evaluate_parser.add_argument('--spam-min-ratio', type=float, default=0.7)
+    evaluate_parser.add_argument('--max-batch-size', type=int, default=1,
+                                 help="Largest batch sent through the first stage (0 = any)")
+    evaluate_parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 64, 0],
+                                 help="Batch sizes to time (0 = whole split)")
+    args = parser.parse_args()
+
+    df = load_dataset(args.data_path)
+    if df is None:
+        sys.exit(1)
+
+    if args.command == 'build':
+        templates = KnownTemplates.from_labeled(df['text'], df['label'], min_count=args.min_count)
+        templates.save(args.output_path)
+        print(f"Saved {len(templates)} templates ({len(templates.spam_hashes)} spam) to {args.output_path}")
+    else:
+        classifier = SpamClassifier(args.model_path, args.vectorizer_path)
+        evaluate_cascade(classifier, df['text'], df['label'], min_count=args.min_count,
+                         ham_min_score=args.ham_min_score, spam_min_score=args.spam_min_score,
+                         spam_min_ratio=args.spam_min_ratio, max_batch_size=args.max_batch_size or None,
+                         batch_sizes=args.batch_sizes)
@@ -0,0 +1,138 @@
+import re
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+# Single private-use characters stand in for normalized spans, so each
+# placeholder contributes its own n-grams without colliding with real text
+PLACEHOLDERS = {
+    'url': '\ue000',
+    'money': '\ue001',
+    'phone': '\ue002',
+    'shortcode': '\ue003',
+    'number': '\ue004'
+}
+
+# Applied to lowercased text; alternatives are tried in order, so URLs and
+# amounts win over the bare numbers inside them
+_PLACEHOLDER_PATTERN = re.compile(r'''
+    (?P<url>(?:https?://|www\.)\S+|\b[a-z0-9-]+(?:\.[a-z0-9-]+)*\.(?:com|net|org|co\.uk|biz|info)\b(?:/\S*)?)
+  | (?P<money>[£$€]\s?\d[\d,.]*|\d[\d,.]*\s?(?:p|ppm|pence|pounds?|gbp|usd|eur)\b)
+  | (?P<phone>\+?\d(?:[\s-]?\d){9,})
+  | (?P<shortcode>\b\d{4,6}\b)
+  | (?P<number>\d+)
+''', re.VERBOSE)
+
+# Only messages containing one of these can need a placeholder
+_HAS_PLACEHOLDER_CANDIDATE = re.compile(r'[0-9]|www\.|https?:|\.(?:com|net|org|co\.uk|biz|info)\b')
+
+# Everything except letters, placeholders and the !?£$€ spam markers
+_SEPARATORS = re.compile('[^a-z!?£$€\ue000-\ue004]+')
+
+# Multiplier of the polynomial n-gram hash and the 64-bit mixing constant
+_HASH_BASE = np.uint64(1000003)
+_HASH_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+def _placeholder(match):
+    return PLACEHOLDERS[match.lastgroup]
+
+def normalize_message(text):
+    """
+    Lowercase a raw message, replace URLs, currency amounts, phone numbers,
+    shortcodes and other numbers with placeholder characters, and collapse
+    every other symbol except !?£$€ into single spaces
+    """
+    text = text.lower()
+    if _HAS_PLACEHOLDER_CANDIDATE.search(text):
+        text = _PLACEHOLDER_PATTERN.sub(_placeholder, text)
+    return _SEPARATORS.sub(' ', text)
+
+def hash_char_ngrams(texts, ngram_range=(2, 3), n_features=2 ** 18):
+    """
+    Count hashed character n-grams of already normalized texts as a CSR
+    matrix
+
+    All texts are padded with a space, joined with NUL separators and
+    hashed together with NumPy: a polynomial hash over each window of
+    code points, mixed and reduced to the top bits. Windows that span a
+    separator are dropped.
+    """
+    if n_features & (n_features - 1):
+        raise ValueError("n_features must be a power of two")
+    shift = np.uint64(64 - int(n_features).bit_length() + 1)
+
+    joined = '\0'.join([' ' + text + ' ' for text in texts])
+    codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    separators = np.concatenate([[0], np.cumsum(codes == 0)])
+
+    rows = []
+    columns = []
+    min_n, max_n = ngram_range
+    for n in range(min_n, max_n + 1):
+        windows = len(codes) - n + 1
+        if windows <= 0:
+            continue
+        hashes = codes[:windows].copy()
+        for k in range(1, n):
+            hashes *= _HASH_BASE
+            hashes += codes[k:k + windows]
+        hashes ^= np.uint64(n)
+        hashes *= _HASH_MIX
+        valid = separators[n:n + windows] == separators[:windows]
+        rows.append(separators[:windows][valid])
+        columns.append((hashes[valid] >> shift).astype(np.int64))
+
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    columns = np.concatenate(columns) if columns else np.zeros(0, dtype=np.int64)
+    counts = sp.csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(len(texts), n_features))
+    counts.sum_duplicates()
+    return counts
+
+class CharNgramVectorizer:
+    """
+    Hashed character n-gram TF-IDF over raw messages, without NLTK
+
+    Works on the original message rather than preprocess_text output
+    (needs_preprocessing is False, which SpamClassifier honours), so digits,
+    currency and URLs survive as placeholder tokens and obfuscated spellings
+    still share most of their n-grams. IDF weights are smoothed as in
+    TfidfVectorizer, with sublinear term frequencies and L2 normalization.
+    """
+    needs_preprocessing = False
+
+    def __init__(self, n_features=2 ** 18, ngram_range=(2, 3), sublinear_tf=True):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.sublinear_tf = sublinear_tf
+        self.idf_ = np.ones(n_features)
+
+    def _counts(self, texts):
+        return hash_char_ngrams([normalize_message(text) for text in texts],
+                                ngram_range=self.ngram_range, n_features=self.n_features)
+
+    def _weight(self, counts):
+        if self.sublinear_tf:
+            np.log(counts.data, counts.data)
+            counts.data += 1
+        counts.data *= self.idf_[counts.indices]
+        return normalize(counts, norm='l2', copy=False)
+
+    def fit_transform(self, texts):
+        """
+        Learn document frequencies from raw messages and return their TF-IDF rows
+        """
+        counts = self._counts(texts)
+        document_frequency = np.bincount(counts.indices, minlength=self.n_features)
+        self.idf_ = np.log((1 + counts.shape[0]) / (1 + document_frequency)) + 1
+        return self._weight(counts)
+
+    def fit(self, texts):
+        self.fit_transform(texts)
+        return self
+
+    def transform(self, texts):
+        """
+        Transform raw messages into L2-normalized TF-IDF rows
+        """
+        return self._weight(self._counts(texts))
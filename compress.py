@@ -0,0 +1,125 @@
+import tempfile
+import time
+import os
+import sys
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.feature_selection import chi2
+from sklearn.preprocessing import normalize
+
+# Add src to path so we can import our modules
+sys.path.append(os.path.dirname(__file__))
+
+from artifact import export_artifact, load_artifact
+from linear_scorer import LinearScorer
+
+PRUNE_METHODS = ('chi2', 'coef')
+
+def feature_scores(model, X, y, method='chi2'):
+    """
+    Importance of every vocabulary column: chi² statistic against the labels,
+    or the magnitude of the fitted model's weight (for naive Bayes, of the
+    spam/ham log-probability difference)
+    """
+    if method == 'chi2':
+        scores, _ = chi2(X, y)
+        return np.nan_to_num(scores)
+    if method == 'coef':
+        scorer = LinearScorer.from_estimator(model)
+        if scorer.kind == 'naive_bayes':
+            return np.abs(scorer.coef[1] - scorer.coef[0])
+        return np.abs(scorer.coef[0])
+    raise ValueError(f"Unknown pruning method: {method}")
+
+def prune_vectorizer(vectorizer, keep):
+    """
+    Copy of a fitted TfidfVectorizer restricted to the columns in keep
+
+    The copy has a fixed vocabulary and the original idf values, so it
+    produces the kept columns of the original features, renormalized.
+    """
+    terms = vectorizer.get_feature_names_out()[keep]
+    pruned = clone(vectorizer).set_params(vocabulary={term: i for i, term in enumerate(terms)},
+                                          max_features=None, min_df=1, max_df=1.0)
+    pruned.idf_ = vectorizer.idf_[keep]
+    return pruned
+
+def prune_model(model, vectorizer, X_train, y_train, target_size, method='chi2'):
+    """
+    Keep the target_size most important vocabulary terms and refit the model
+    on them, returning (model, vectorizer) for the smaller feature space
+    """
+    if not hasattr(vectorizer, 'idf_'):
+        raise ValueError("Only plain TfidfVectorizer features can be pruned")
+    if target_size < 1:
+        raise ValueError(f"target_size must be at least 1, got {target_size}")
+    scores = feature_scores(model, X_train, y_train, method)
+    keep = np.sort(np.argsort(-scores, kind='stable')[:target_size])
+
+    X_pruned = X_train[:, keep]
+    if vectorizer.norm is not None:
+        # Same as transforming with the pruned vectorizer: the original row
+        # norm cancels out when the kept columns are renormalized
+        X_pruned = normalize(X_pruned, norm=vectorizer.norm)
+    return clone(model).fit(X_pruned, y_train), prune_vectorizer(vectorizer, keep)
+
+def _evaluate_artifact(path, test_texts, y_test, latency_samples):
+    scorer, vectorizer = load_artifact(path)
+    accuracy = float(np.mean(scorer.predict(vectorizer.transform(test_texts)) == y_test))
+
+    timings = []
+    for text in test_texts[:latency_samples]:
+        start = time.perf_counter()
+        scorer.predict(vectorizer.transform([text]))
+        timings.append(time.perf_counter() - start)
+    return {
+        'accuracy': accuracy,
+        'artifact_bytes': os.path.getsize(path),
+        'latency_us': float(np.median(timings)) * 1e6
+    }
+
+def compression_report(model, vectorizer, X_train, y_train, test_texts, y_test, target_sizes,
+                       method='chi2', dtype='float32', output_dir=None, model_name='model',
+                       latency_samples=500):
+    """
+    Accuracy, artifact size and single-message latency on the held-out split
+    for the full model and for each pruned vocabulary size
+
+    Every variant is exported with export_artifact and scored from the
+    artifact, so the numbers are what a serving worker would see. Pruned
+    artifacts are kept in output_dir as <model_name>_<size>_<dtype>.spamart.
+    """
+    test_texts = list(test_texts)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pickle_path = os.path.join(tmp_dir, 'model.pkl')
+        joblib.dump((model, vectorizer), pickle_path)
+        pickle_bytes = os.path.getsize(pickle_path)
+
+        full_path = os.path.join(tmp_dir, 'full.spamart')
+        export_artifact(model, vectorizer, full_path, dtype='float64')
+        report = [dict(_evaluate_artifact(full_path, test_texts, y_test, latency_samples),
+                       vocabulary=len(vectorizer.vocabulary_), dtype='float64', pickle_bytes=pickle_bytes)]
+
+        for target_size in target_sizes:
+            pruned_model, pruned_vectorizer = prune_model(model, vectorizer, X_train, y_train,
+                                                          target_size, method=method)
+            filename = f'{model_name}_{target_size}_{dtype}.spamart'
+            path = os.path.join(output_dir or tmp_dir, filename)
+            if output_dir is not None:
+                os.makedirs(output_dir, exist_ok=True)
+            export_artifact(pruned_model, pruned_vectorizer, path, dtype=dtype)
+            entry = dict(_evaluate_artifact(path, test_texts, y_test, latency_samples),
+                         vocabulary=len(pruned_vectorizer.vocabulary_), dtype=dtype)
+            if output_dir is not None:
+                entry['path'] = path
+            report.append(entry)
+
+    print(f"\n{'='*50}")
+    print(f"COMPRESSION REPORT ({method} pruning, pickled model+vectorizer {pickle_bytes / 1024:.1f} KB)")
+    print(f"{'='*50}")
+    for entry in report:
+        print(f"vocab={entry['vocabulary']:<6} {entry['dtype']:<8} accuracy={entry['accuracy']:.4f} "
+              f"size={entry['artifact_bytes'] / 1024:.1f}KB latency={entry['latency_us']:.0f}µs")
+    return report
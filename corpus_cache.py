@@ -0,0 +1,121 @@
+import hashlib
+import importlib
+import inspect
+import json
+import os
+
+import joblib
+import numpy as np
+import scipy.sparse as sp
+
+import preprocess
+
+def file_fingerprint(path, block_size=1 << 20):
+    """
+    SHA-256 of a file's contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def preprocessing_fingerprint():
+    """
+    Hash of the preprocessing code and stopword list, so cached text is
+    invalidated whenever either changes
+    """
+    digest = hashlib.sha256()
+    digest.update(inspect.getsource(preprocess).encode('utf-8'))
+    digest.update('\n'.join(sorted(preprocess.get_preprocessor().stop_words)).encode('utf-8'))
+    return digest.hexdigest()
+
+def source_fingerprint(*module_names):
+    """
+    Hash of the source of the named modules that build a feature matrix, so
+    cached features are invalidated whenever any of them changes
+    """
+    digest = hashlib.sha256()
+    for name in module_names:
+        digest.update(name.encode('utf-8'))
+        digest.update(inspect.getsource(importlib.import_module(name)).encode('utf-8'))
+    return digest.hexdigest()
+
+def cache_key(*parts):
+    """
+    Combine fingerprints and JSON-serializable config into one cache key
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+class CorpusCache:
+    """
+    Content-addressed on-disk cache of preprocessed text and fitted TF-IDF features
+
+    Preprocessed text is keyed on the dataset contents plus the preprocessing
+    code; features additionally on the vectorizer configuration and the
+    source of the modules that build them (feature_modules). Text is
+    stored as one UTF-8 byte array plus offsets, features as a sparse .npz.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def corpus_key(self, data_path):
+        return cache_key('corpus', file_fingerprint(data_path), preprocessing_fingerprint())
+
+    def features_key(self, corpus_key, vectorizer_params, feature_modules=()):
+        return cache_key('features', corpus_key, vectorizer_params, source_fingerprint(*feature_modules))
+
+    def _path(self, key, name):
+        return os.path.join(self.cache_dir, key, name)
+
+    def load_corpus(self, key):
+        """
+        Return the cached list of preprocessed texts, or None
+        """
+        path = self._path(key, 'corpus.npz')
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            text_bytes = data['text_bytes'].tobytes()
+            offsets = data['offsets']
+        return [text_bytes[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+    def save_corpus(self, key, cleaned_texts):
+        """
+        Store preprocessed texts under key
+        """
+        encoded = [text.encode('utf-8') for text in cleaned_texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+        os.makedirs(os.path.join(self.cache_dir, key), exist_ok=True)
+        self._atomic_save(self._path(key, 'corpus.npz'),
+                          lambda f: np.savez(f, text_bytes=np.frombuffer(b''.join(encoded), dtype=np.uint8),
+                                             offsets=offsets))
+
+    def load_features(self, key):
+        """
+        Return the cached (X, fitted vectorizer), or None
+        """
+        matrix_path = self._path(key, 'features.npz')
+        vectorizer_path = self._path(key, 'vectorizer.pkl')
+        if not (os.path.exists(matrix_path) and os.path.exists(vectorizer_path)):
+            return None
+        return sp.load_npz(matrix_path), joblib.load(vectorizer_path)
+
+    def save_features(self, key, X, vectorizer):
+        """
+        Store a TF-IDF matrix and the vectorizer that produced it under key
+        """
+        os.makedirs(os.path.join(self.cache_dir, key), exist_ok=True)
+        self._atomic_save(self._path(key, 'vectorizer.pkl'), lambda f: joblib.dump(vectorizer, f))
+        self._atomic_save(self._path(key, 'features.npz'), lambda f: sp.save_npz(f, sp.csr_matrix(X)))
+
+    @staticmethod
+    def _atomic_save(path, write):
+        # Write to a temporary file first so an interrupted run never leaves
+        # a truncated entry behind
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
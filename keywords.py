@@ -0,0 +1,166 @@
+import re
+
+import numpy as np
+import scipy.sparse as sp
+
+# Keyword lists used by the rule-based SpamDetector and the rule features
+SPAM_KEYWORDS = [
+    'free', 'win', 'prize', 'cash', 'money', 'claim', 'now', 'click',
+    'urgent', 'limited', 'offer', 'congratulations', 'winner', 'selected',
+    'award', 'bonus', 'discount', 'deal', 'save', 'profit', 'income',
+    'work from home', 'earn', 'salary', 'million', 'thousand', 'dollar',
+    '£', '$', '€', '!!!', 'urgent', 'immediately', 'act now', 'call now',
+    'text to', 'reply', 'subscribe', 'unsubscribe', 'winner', 'won',
+    'lucky', 'draw', 'lottery', 'jackpot', 'reward', 'grant', 'fund',
+    'investment', 'opportunity', 'risk-free', 'guarantee', 'trial',
+    'subscription', 'membership', 'fee', 'payment', 'credit', 'loan',
+    'mortgage', 'insurance', 'refinance', 'debt', 'bank', 'account',
+    'password', 'verify', 'confirm', 'update', 'information', 'security',
+    'alert', 'warning', 'important', 'notice', 'message', 'notification',
+    'deadline', 'expire', 'limited time', 'only', 'exclusive', 'special',
+    'secret', 'hidden', 'revealed', 'discovered', 'breakthrough', 'miracle',
+    'instant', 'fast', 'quick', 'easy', 'simple', 'proven', 'scientific',
+    'medical', 'health', 'weight', 'loss', 'diet', 'pill', 'supplement',
+    'cream', 'oil', 'product', 'service', 'business', 'marketing', 'sales',
+    'promotion', 'discount', 'coupon', 'voucher', 'code', 'offer', 'deal',
+    'clearance', 'sale', 'buy', 'purchase', 'order', 'shop', 'store',
+    'website', 'link', 'url', 'http', 'www', '.com', 'visit', 'click here',
+    'call', 'phone', 'mobile', 'text', 'sms', 'message', 'chat', 'contact',
+    'hello dear', 'dear friend', 'valued customer', 'valued member'
+]
+
+HAM_KEYWORDS = [
+    'hello', 'hi', 'hey', 'meeting', 'lunch', 'dinner', 'coffee', 'tea',
+    'tomorrow', 'today', 'yesterday', 'weekend', 'morning', 'evening',
+    'work', 'office', 'home', 'family', 'friend', 'friends', 'party',
+    'birthday', 'wedding', 'anniversary', 'congrats', 'congratulations',
+    'thanks', 'thank you', 'please', 'sorry', 'ok', 'okay', 'yes', 'no',
+    'maybe', 'probably', 'possibly', 'think', 'thought', 'idea', 'plan',
+    'project', 'task', 'assignment', 'deadline', 'meeting', 'appointment',
+    'doctor', 'dentist', 'hospital', 'school', 'college', 'university',
+    'class', 'lecture', 'seminar', 'workshop', 'training', 'course',
+    'holiday', 'vacation', 'travel', 'trip', 'flight', 'hotel', 'booking',
+    'reservation', 'ticket', 'movie', 'film', 'show', 'concert', 'game',
+    'sports', 'football', 'cricket', 'weather', 'rain', 'sunny', 'cold',
+    'hot', 'food', 'restaurant', 'cafe', 'bar', 'pub', 'club', 'music'
+]
+
+# Currency terms count double when they appear in a message
+CURRENCY_KEYWORDS = ['$', '£', '€', 'money', 'cash', 'dollar']
+
+def keyword_weights(spam_keywords=SPAM_KEYWORDS, ham_keywords=HAM_KEYWORDS,
+                    currency_keywords=CURRENCY_KEYWORDS):
+    """
+    Per-keyword spam and ham weights
+
+    Duplicate list entries and the extra currency weight are folded in, so
+    summing the weights of the distinct keywords found in a message gives
+    the same scores as checking every list entry.
+    """
+    spam_weights = {}
+    for keyword in spam_keywords:
+        weight = 2 if keyword in currency_keywords else 1
+        spam_weights[keyword] = spam_weights.get(keyword, 0) + weight
+    ham_weights = {}
+    for keyword in ham_keywords:
+        ham_weights[keyword] = ham_weights.get(keyword, 0) + 1
+    return spam_weights, ham_weights
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+def _trie_pattern(words):
+    """
+    Build a regex alternation shaped like a trie so the engine only follows
+    branches that match the next character
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        end = '' in node
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if end:
+            # Greedy optional group prefers the longer keyword
+            return '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+class KeywordMatcher:
+    """
+    Single-pass multi-keyword substring matcher
+
+    Every keyword is compiled into one trie-shaped regex wrapped in a
+    lookahead, so a single scan reports the longest keyword starting at each
+    position. Shorter keywords starting at the same position are exactly the
+    prefixes of that match, which are precomputed, so the set of keywords
+    found is the same as running `keyword in text` for each one.
+
+    With whole_words=True (for keywords that start and end with a word
+    character) a keyword only matches between word boundaries, as with
+    re.search(r'\bkeyword\b'), so 'hi' is not found in 'this'.
+    """
+    def __init__(self, keywords, whole_words=False):
+        self.keywords = sorted(set(keywords))
+        self.whole_words = whole_words
+        boundary = r'\b' if whole_words else ''
+        self.pattern = re.compile('(?=' + boundary + '(' + _trie_pattern(self.keywords) + ')' + boundary + ')')
+        keyword_set = set(self.keywords)
+        self.prefixes = {
+            keyword: [keyword[:i] for i in range(1, len(keyword) + 1)
+                      if keyword[:i] in keyword_set and not (
+                          # A shorter whole word must end where a word does
+                          whole_words and i < len(keyword) and _is_word_char(keyword[i]))]
+            for keyword in self.keywords
+        }
+        index = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self._prefix_ids = {keyword: [index[prefix] for prefix in prefixes]
+                            for keyword, prefixes in self.prefixes.items()}
+
+    def find(self, text):
+        """
+        Return the set of distinct keywords that occur in text
+        """
+        found = set()
+        prefixes = self.prefixes
+        for longest in set(self.pattern.findall(text)):
+            found.update(prefixes[longest])
+        return found
+
+    def find_batch(self, texts):
+        """
+        Return a binary (n_texts, n_keywords) CSR matrix of keyword hits,
+        with columns in self.keywords order
+
+        All texts are joined with NUL separators (no keyword contains one)
+        and scanned in a single pass; match positions are mapped back to
+        rows with searchsorted.
+        """
+        texts = [text.replace('\0', ' ') for text in texts]
+        lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts))
+        starts = np.zeros(len(texts), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=starts[1:])
+
+        positions = []
+        columns = []
+        prefix_ids = self._prefix_ids
+        for match in self.pattern.finditer('\0'.join(texts)):
+            ids = prefix_ids[match.group(1)]
+            positions.extend([match.start()] * len(ids))
+            columns.extend(ids)
+
+        rows = np.searchsorted(starts, np.asarray(positions, dtype=np.int64), side='right') - 1
+        hits = sp.csr_matrix((np.ones(len(columns)), (rows, np.asarray(columns, dtype=np.int64))),
+                             shape=(len(texts), len(self.keywords)))
+        hits.sum_duplicates()
+        hits.data[:] = 1
+        return hits
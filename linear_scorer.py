@@ -0,0 +1,101 @@
+import numpy as np
+import scipy.sparse as sp
+
+class LinearScorer:
+    """
+    Linear decision function over flat NumPy arrays
+
+    kind is one of:
+      'naive_bayes' - coef holds per-class feature log-probabilities and
+                      intercept the class log-priors (probabilities via softmax)
+      'logistic'    - binary weights with a sigmoid link
+      'linear'      - binary weights with no probability estimate
+
+    coef may be int8-quantized per class row, in which case coef_scale and
+    coef_offset hold each row's affine mapping (value = offset + q * scale)
+    and weights are dequantized only for the columns a batch touches.
+    """
+    KINDS = ('naive_bayes', 'logistic', 'linear')
+
+    def __init__(self, kind, coef, intercept, classes, coef_scale=None, coef_offset=None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown scorer kind: {kind}")
+        self.kind = kind
+        self.coef = np.asarray(coef)
+        self.intercept = np.asarray(intercept)
+        self.classes_ = np.asarray(classes)
+        self.coef_scale = None if coef_scale is None else np.asarray(coef_scale)
+        self.coef_offset = None if coef_offset is None else np.asarray(coef_offset)
+
+    @classmethod
+    def from_estimator(cls, model):
+        """
+        Extract coefficients from a fitted sklearn linear model or MultinomialNB
+        """
+        if hasattr(model, 'feature_log_prob_') and hasattr(model, 'class_log_prior_'):
+            return cls('naive_bayes', model.feature_log_prob_, model.class_log_prior_, model.classes_)
+
+        if not hasattr(model, 'coef_') or len(model.classes_) != 2:
+            raise ValueError(f"Unsupported model for linear scoring: {type(model).__name__}")
+
+        coef = model.coef_
+        if hasattr(coef, 'toarray'):
+            coef = coef.toarray()
+        coef = np.asarray(coef, dtype=np.float64).reshape(1, -1)
+        intercept = np.asarray(model.intercept_, dtype=np.float64).reshape(1)
+
+        loss = getattr(model, 'loss', None)
+        if type(model).__name__ == 'LogisticRegression' or loss in ('log', 'log_loss'):
+            kind = 'logistic'
+        else:
+            kind = 'linear'
+        return cls(kind, coef, intercept, model.classes_)
+
+    def decision_function(self, X):
+        """
+        Raw scores: (n, n_classes) joint log-likelihood for naive Bayes,
+        (n,) signed margin for the binary linear kinds
+        """
+        if sp.isspmatrix_csr(X) and X.shape[0] == 1:
+            # A single CSR row only touches a handful of columns; gathering
+            # them directly skips the sparse matmul dispatch
+            weights = self.coef[:, X.indices]
+            if self.coef_scale is not None:
+                weights = weights * self.coef_scale[:, np.newaxis] + self.coef_offset[:, np.newaxis]
+            scores = (weights @ X.data)[np.newaxis, :] + self.intercept
+        elif self.coef_scale is not None:
+            # (offset + q * scale) . x = (q . x) * scale + offset * sum(x)
+            row_sums = np.asarray(X.sum(axis=1)).reshape(-1, 1)
+            scores = (np.asarray(X @ self.coef.T) * self.coef_scale
+                      + row_sums * self.coef_offset + self.intercept)
+        else:
+            scores = np.asarray(X @ self.coef.T) + self.intercept
+        if self.kind == 'naive_bayes':
+            return scores
+        return scores.ravel()
+
+    def predict(self, X):
+        """
+        Predict class labels
+        """
+        scores = self.decision_function(X)
+        if self.kind == 'naive_bayes':
+            return self.classes_[scores.argmax(axis=1)]
+        return self.classes_[(scores > 0).astype(int)]
+
+    def _predict_proba(self, X):
+        scores = self.decision_function(X)
+        if self.kind == 'naive_bayes':
+            scores = scores - scores.max(axis=1, keepdims=True)
+            probabilities = np.exp(scores)
+            return probabilities / probabilities.sum(axis=1, keepdims=True)
+        positive = 1.0 / (1.0 + np.exp(-scores))
+        return np.column_stack([1.0 - positive, positive])
+
+    @property
+    def predict_proba(self):
+        # Only probabilistic kinds expose predict_proba, so hasattr() checks
+        # behave the same as on the sklearn estimators
+        if self.kind == 'linear':
+            raise AttributeError("predict_proba is not available for this model")
+        return self._predict_proba
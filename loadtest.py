@@ -0,0 +1,130 @@
+import argparse
+import http.client
+import json
+import signal
+import socket
+import subprocess
+import time
+import os
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+
+# Add src to path so we can import our modules
+sys.path.append(os.path.dirname(__file__))
+
+from registry import WARMUP_MESSAGES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_until_ready(port, timeout=60.0):
+    """
+    Poll /ready until the server reports a warm model
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/ready')
+            if connection.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.1)
+    return False
+
+def _client(args):
+    """
+    Send n requests one after another, returning their latencies in seconds
+    """
+    port, n_requests, body = args
+    latencies = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        connection.request('POST', '/api/v1/classify', body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        connection.close()
+        if response.status != 200:
+            raise RuntimeError(f"Request failed with HTTP {response.status}")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def run_load(port, n_requests, concurrency, batch_size=1):
+    """
+    Fire n_requests at /api/v1/classify from concurrency client processes
+    """
+    if batch_size == 1:
+        body = json.dumps({'message': WARMUP_MESSAGES[1]})
+    else:
+        body = json.dumps((WARMUP_MESSAGES * batch_size)[:batch_size])
+    per_client = max(1, n_requests // concurrency)
+
+    with Pool(concurrency) as pool:
+        start = time.perf_counter()
+        latencies = np.concatenate(pool.map(_client, [(port, per_client, body)] * concurrency))
+        seconds = time.perf_counter() - start
+
+    return {
+        'requests': len(latencies),
+        'requests_per_sec': len(latencies) / seconds,
+        'messages_per_sec': len(latencies) * batch_size / seconds,
+        'p50_ms': float(np.percentile(latencies, 50)) * 1000,
+        'p99_ms': float(np.percentile(latencies, 99)) * 1000
+    }
+
+def load_test(worker_counts, threads=8, n_requests=2000, concurrency=16, batch_size=1):
+    """
+    Start serve.py with each worker count and measure requests/sec
+    """
+    results = {}
+    for workers in worker_counts:
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(BASE_DIR, 'serve.py'), '--host', '127.0.0.1',
+             '--port', str(port), '--workers', str(workers), '--threads', str(threads),
+             '--no-access-log'],
+            stdout=subprocess.DEVNULL)
+        try:
+            if not wait_until_ready(port):
+                raise RuntimeError(f"Server with {workers} workers did not become ready")
+            run_load(port, min(n_requests, 100), concurrency, batch_size)  # warm every worker
+            results[workers] = run_load(port, n_requests, concurrency, batch_size)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+
+        stats = results[workers]
+        print(f"   {workers} workers: {stats['requests_per_sec']:.0f} requests/sec "
+              f"({stats['messages_per_sec']:.0f} msgs/sec) "
+              f"p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local load test of the multi-worker server")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help="Worker counts to compare")
+    parser.add_argument('--threads', type=int, default=8, help="Request threads per worker")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16, help="Client processes")
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help="Messages per request (1 sends {\"message\": ...})")
+    parser.add_argument('--output', help="Write JSON results to this path")
+    args = parser.parse_args()
+
+    print(f"⏱️  Load test ({args.requests} requests, {args.concurrency} clients, "
+          f"{args.batch_size} messages/request, {os.cpu_count()} CPUs)")
+    results = load_test(args.workers, threads=args.threads, n_requests=args.requests,
+                        concurrency=args.concurrency, batch_size=args.batch_size)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to: {args.output}")
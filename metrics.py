@@ -0,0 +1,144 @@
+import resource
+import sys
+import threading
+from bisect import bisect_left
+
+# Log-spaced bucket upper bounds: 1µs .. ~8s for latencies, 1 .. 4096 for batch sizes
+LATENCY_BUCKETS = [1e-6 * 2 ** i for i in range(24)]
+BATCH_SIZE_BUCKETS = [2 ** i for i in range(13)]
+
+def peak_memory_mb():
+    """
+    Peak resident set size of this process in megabytes
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+
+class Histogram:
+    """
+    Fixed-bucket histogram with count, sum and interpolated quantiles
+    """
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """
+        Record one observation
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q):
+        """
+        Estimate the q-quantile by linear interpolation inside its bucket
+        """
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= target and bucket_count > 0:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (target - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def summary(self):
+        """
+        Return count, sum and p50/p95/p99 as a dictionary
+        """
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99)
+        }
+
+class PipelineMetrics:
+    """
+    Per-stage latency histograms and a batch-size histogram for SpamClassifier
+    """
+    STAGES = ('clean', 'stopwords', 'stem', 'vectorize', 'predict')
+
+    def __init__(self):
+        self.stages = {stage: Histogram(LATENCY_BUCKETS) for stage in self.STAGES}
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+
+    def observe(self, stage, seconds):
+        """
+        Record the time spent in one pipeline stage
+        """
+        self.stages[stage].observe(seconds)
+
+    def summary(self):
+        """
+        Return every histogram summary as a dictionary
+        """
+        summary = {stage: histogram.summary() for stage, histogram in self.stages.items()}
+        summary['batch_size'] = self.batch_size.summary()
+        return summary
+
+def _histogram_lines(name, histogram, labels=''):
+    lines = []
+    cumulative = 0
+    separator = ',' if labels else ''
+    for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+        cumulative += bucket_count
+        lines.append(f'{name}_bucket{{{labels}{separator}le="{bound:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {histogram.count}')
+    suffix = f'{{{labels}}}' if labels else ''
+    lines.append(f'{name}_sum{suffix} {histogram.sum:.9g}')
+    lines.append(f'{name}_count{suffix} {histogram.count}')
+    return lines
+
+def render_prometheus(metrics=None, cache_stats=None, gauges=None, counters=None):
+    """
+    Render pipeline histograms, cache counters and any extra {name: value}
+    gauges and monotonically increasing counters in Prometheus text format
+    """
+    lines = []
+    if metrics is not None:
+        lines.append('# HELP spam_stage_seconds Time spent in each classifier pipeline stage')
+        lines.append('# TYPE spam_stage_seconds histogram')
+        for stage, histogram in metrics.stages.items():
+            lines.extend(_histogram_lines('spam_stage_seconds', histogram, f'stage="{stage}"'))
+
+        lines.append('# HELP spam_stage_seconds_quantile Estimated stage latency quantiles')
+        lines.append('# TYPE spam_stage_seconds_quantile gauge')
+        for stage, histogram in metrics.stages.items():
+            for q in (0.5, 0.95, 0.99):
+                lines.append(f'spam_stage_seconds_quantile{{stage="{stage}",quantile="{q}"}} '
+                             f'{histogram.quantile(q):.9g}')
+
+        lines.append('# HELP spam_batch_size Messages per classifier call')
+        lines.append('# TYPE spam_batch_size histogram')
+        lines.extend(_histogram_lines('spam_batch_size', metrics.batch_size))
+
+    if cache_stats is not None:
+        for key in ('hits', 'misses', 'evictions'):
+            lines.append(f'# TYPE spam_cache_{key}_total counter')
+            lines.append(f'spam_cache_{key}_total {cache_stats[key]}')
+        lines.append('# TYPE spam_cache_size gauge')
+        lines.append(f'spam_cache_size {cache_stats["size"]}')
+
+    for name, value in (gauges or {}).items():
+        if value is not None:
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value:.9g}')
+
+    for name, value in (counters or {}).items():
+        if value is not None:
+            lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name} {value:.9g}')
+
+    return '\n'.join(lines) + '\n'
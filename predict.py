@@ -1,45 +1,185 @@
-import joblib
+import numpy as np
 import os
 import sys
+from time import perf_counter
 
 # Add src to path so we can import our modules
 sys.path.append(os.path.dirname(__file__))
 
-from preprocess import preprocess_text
+from artifact import load_artifact
+from cache import PredictionCache, text_key
+from linear_scorer import LinearScorer
+from preprocess import get_preprocessor, preprocess_text
 
 class SpamClassifier:
-    def __init__(self, model_path, vectorizer_path):
+    def __init__(self, model_path, vectorizer_path=None, cache_size=0, cache_ttl=None,
+                 fast_path=False, metrics=None):
         """
         Initialize the spam classifier with trained model and vectorizer
+        
+        If vectorizer_path is None, model_path is a compact artifact written
+        by artifact.export_artifact and is memory-mapped instead of unpickled.
+        
+        cache_size > 0 enables an LRU cache of predictions keyed on the
+        preprocessed text; cache_ttl (seconds) optionally expires entries.
+        
+        fast_path=True scores linear models with LinearScorer instead of
+        sklearn's predict/predict_proba (artifacts always use LinearScorer).
+        
+        metrics is an optional metrics.PipelineMetrics that receives per-stage
+        timings; when None no timing calls are made.
         """
-        self.model = joblib.load(model_path)
-        self.vectorizer = joblib.load(vectorizer_path)
+        self.fast_path = fast_path
+        self.metrics = metrics
+        self.cache = PredictionCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self.load(model_path, vectorizer_path)
         print("✅ Spam classifier loaded successfully!")
     
+    def load(self, model_path, vectorizer_path=None):
+        """
+        (Re)load the model and vectorizer, invalidating cached predictions
+        """
+        if vectorizer_path is None:
+            self.model, self.vectorizer = load_artifact(model_path)
+        else:
+            # Compact artifacts need neither joblib nor sklearn
+            import joblib
+
+            self.model = joblib.load(model_path)
+            self.vectorizer = joblib.load(vectorizer_path)
+            if self.fast_path:
+                self.model = LinearScorer.from_estimator(self.model)
+        if self.cache is not None:
+            self.cache.clear()
+    
+    def cache_stats(self):
+        """
+        Return prediction cache counters, or None if caching is disabled
+        """
+        return self.cache.stats() if self.cache is not None else None
+    
+    def _uses_raw_text(self):
+        # Vectorizers with rule features also need the unprocessed message
+        return getattr(self.vectorizer, 'uses_raw_text', False)
+    
+    def _cached_batch(self, kind, cleaned_texts, raw_texts, compute):
+        """
+        Look up each text in the cache and compute only the misses in one call
+        """
+        if self.cache is None:
+            return list(compute(cleaned_texts, raw_texts))
+        
+        if self._uses_raw_text():
+            keys = [(kind, text_key(cleaned + '\0' + raw)) for cleaned, raw in zip(cleaned_texts, raw_texts)]
+        else:
+            keys = [(kind, text_key(text)) for text in cleaned_texts]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        
+        if missing:
+            computed = compute([cleaned_texts[i] for i in missing], [raw_texts[i] for i in missing])
+            for i, value in zip(missing, computed):
+                # Copy, so a cached row does not keep the whole batch array alive
+                value = np.array(value)
+                results[i] = value
+                self.cache.put(keys[i], value)
+        
+        return results
+    
+    def _preprocess(self, email_texts):
+        if self.metrics is not None:
+            self.metrics.batch_size.observe(len(email_texts))
+        if not getattr(self.vectorizer, 'needs_preprocessing', True):
+            # Vectorizers such as CharNgramVectorizer normalize raw text themselves
+            return list(email_texts)
+        if self.metrics is None:
+            return [preprocess_text(text) for text in email_texts]
+        preprocessor = get_preprocessor()
+        observe = self.metrics.observe
+        return [preprocessor.timed(text, observe) for text in email_texts]
+    
+    def _transform(self, cleaned_texts, raw_texts):
+        if self._uses_raw_text():
+            return self.vectorizer.transform(cleaned_texts, raw_texts=raw_texts)
+        return self.vectorizer.transform(cleaned_texts)
+    
+    def _run_model(self, cleaned_texts, raw_texts, predict):
+        if self.metrics is None:
+            return predict(self._transform(cleaned_texts, raw_texts))
+        start = perf_counter()
+        vectorized_texts = self._transform(cleaned_texts, raw_texts)
+        vectorized = perf_counter()
+        result = predict(vectorized_texts)
+        self.metrics.observe('vectorize', vectorized - start)
+        self.metrics.observe('predict', perf_counter() - vectorized)
+        return result
+    
+    def _compute_labels(self, cleaned_texts, raw_texts):
+        predictions = self._run_model(cleaned_texts, raw_texts, self.model.predict)
+        return np.where(predictions == 1, "Spam", "Ham")
+    
+    def _compute_probabilities(self, cleaned_texts, raw_texts):
+        return self._run_model(cleaned_texts, raw_texts, self.model.predict_proba)
+    
     def predict(self, email_text):
         """
         Predict if an email is spam or ham
         """
-        cleaned_text = preprocess_text(email_text)
-        vectorized_text = self.vectorizer.transform([cleaned_text])
-        prediction = self.model.predict(vectorized_text)
-        return "Spam" if prediction[0] == 1 else "Ham"
+        cleaned_text = self._preprocess([email_text])[0]
+        return str(self._cached_batch('label', [cleaned_text], [email_text], self._compute_labels)[0])
     
     def predict_probability(self, email_text):
         """
         Get prediction probabilities (if model supports it)
         """
-        cleaned_text = preprocess_text(email_text)
-        vectorized_text = self.vectorizer.transform([cleaned_text])
-        
         if hasattr(self.model, 'predict_proba'):
-            probabilities = self.model.predict_proba(vectorized_text)[0]
+            cleaned_text = self._preprocess([email_text])[0]
+            probabilities = self._cached_batch('proba', [cleaned_text], [email_text], self._compute_probabilities)[0]
             return {
                 'Ham': probabilities[0],
                 'Spam': probabilities[1]
             }
         else:
             return "Probability not available for this model"
+    
+    def predict_batch(self, email_texts):
+        """
+        Predict spam or ham for a list of emails with a single model call
+        """
+        email_texts = list(email_texts)
+        if not email_texts:
+            # sklearn vectorizers reject empty input
+            return np.empty(0, dtype='<U4')
+        cleaned_texts = self._preprocess(email_texts)
+        return np.asarray(self._cached_batch('label', cleaned_texts, email_texts, self._compute_labels))
+    
+    def predict_proba_batch(self, email_texts):
+        """
+        Get Ham/Spam probabilities for a list of emails as an (n, 2) array
+        """
+        if hasattr(self.model, 'predict_proba'):
+            email_texts = list(email_texts)
+            if not email_texts:
+                return np.empty((0, 2))
+            cleaned_texts = self._preprocess(email_texts)
+            probabilities = self._cached_batch('proba', cleaned_texts, email_texts,
+                                               self._compute_probabilities)
+            return np.asarray(probabilities).reshape(-1, 2)
+        else:
+            return "Probability not available for this model"
+    
+    def classify_batch(self, email_texts):
+        """
+        Return (labels, spam_probabilities) for a list of emails from one model call
+        
+        spam_probabilities is None when the model has no predict_proba.
+        """
+        if not hasattr(self.model, 'predict_proba'):
+            return self.predict_batch(email_texts), None
+        
+        probabilities = self.predict_proba_batch(email_texts)
+        labels = np.where(probabilities.argmax(axis=1) == 1, "Spam", "Ham")
+        return labels, probabilities[:, 1]
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,264 @@
+import argparse
+import json
+import shutil
+import threading
+import time
+import os
+import sys
+from datetime import datetime, timezone
+
+# Add src to path so we can import our modules
+sys.path.append(os.path.dirname(__file__))
+
+from metrics import peak_memory_mb
+from predict import SpamClassifier
+
+MANIFEST = 'manifest.json'
+
+WARMUP_MESSAGES = [
+    "Hey, are we still meeting for lunch tomorrow?",
+    "Congratulations! You won a $1000 gift card. Click here to claim!",
+    "Your package will be delivered today between 2-4 PM.",
+    "URGENT: Your bank account needs verification. Click now!",
+    "Free iPhone! Call now to claim your prize!"
+]
+
+def current_memory_mb():
+    """
+    Current resident set size in megabytes (peak RSS where /proc is unavailable)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_memory_mb()
+
+class ModelRegistry:
+    """
+    Directory of versioned model artifacts plus a JSON manifest
+
+    Each version lives in its own subdirectory (v1, v2, ...). The manifest
+    lists every version and which one is current, and is always replaced
+    atomically so readers never see a partial write.
+    """
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+    def _manifest_path(self):
+        return os.path.join(self.root_dir, MANIFEST)
+
+    def manifest(self):
+        """
+        Return the manifest, or an empty one if the registry is new
+        """
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'current': None, 'versions': []}
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.root_dir, exist_ok=True)
+        tmp_path = self._manifest_path() + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self._manifest_path())
+
+    def register(self, model_path, vectorizer_path=None, activate=False, notes=''):
+        """
+        Copy a model (and vectorizer, unless it is a compact artifact) into a
+        new version directory, returning the version number
+        """
+        manifest = self.manifest()
+        version = max([entry['version'] for entry in manifest['versions']] + [0]) + 1
+        version_dir = os.path.join(self.root_dir, f'v{version}')
+        os.makedirs(version_dir, exist_ok=True)
+
+        entry = {
+            'version': version,
+            'created': datetime.now(timezone.utc).isoformat(),
+            'notes': notes,
+            'model': os.path.join(f'v{version}', os.path.basename(model_path)),
+            'vectorizer': None
+        }
+        shutil.copy2(model_path, os.path.join(self.root_dir, entry['model']))
+        if vectorizer_path is not None:
+            entry['vectorizer'] = os.path.join(f'v{version}', os.path.basename(vectorizer_path))
+            shutil.copy2(vectorizer_path, os.path.join(self.root_dir, entry['vectorizer']))
+
+        manifest['versions'].append(entry)
+        if activate or manifest['current'] is None:
+            manifest['current'] = version
+        self._write_manifest(manifest)
+        print(f"Registered version {version} in {self.root_dir}")
+        return version
+
+    def activate(self, version):
+        """
+        Make version the current one
+        """
+        manifest = self.manifest()
+        if version not in [entry['version'] for entry in manifest['versions']]:
+            raise ValueError(f"Unknown model version: {version}")
+        manifest['current'] = version
+        self._write_manifest(manifest)
+
+    def current_version(self):
+        return self.manifest()['current']
+
+    def paths(self, version=None):
+        """
+        Absolute (model_path, vectorizer_path) of version (default: current)
+        """
+        manifest = self.manifest()
+        if version is None:
+            version = manifest['current']
+        for entry in manifest['versions']:
+            if entry['version'] == version:
+                vectorizer = entry['vectorizer']
+                return (os.path.join(self.root_dir, entry['model']),
+                        os.path.join(self.root_dir, vectorizer) if vectorizer else None)
+        raise ValueError(f"Unknown model version: {version}")
+
+class HotReloader:
+    """
+    Serves the registry's current model and hot-swaps to new versions
+
+    A new version is loaded and warmed up beside the live one, then swapped
+    in with a single reference assignment, so requests never pause: calls
+    already running finish on the old classifier. Attribute access (predict,
+    classify_batch, metrics, ...) is forwarded to the live classifier, so a
+    HotReloader can stand in for a SpamClassifier.
+    """
+    def __init__(self, registry, poll_interval=5.0, warmup_messages=WARMUP_MESSAGES, **classifier_kwargs):
+        self.registry = registry
+        self.poll_interval = poll_interval
+        self.warmup_messages = warmup_messages
+        self.classifier_kwargs = classifier_kwargs
+        self.swaps = 0
+        self.last_swap = {}
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.version = None
+        self.classifier = None
+        self.reload()
+
+    def reload(self, version=None):
+        """
+        Load version (default: current), warm it up and swap it in
+        """
+        with self._reload_lock:
+            if version is None:
+                version = self.registry.current_version()
+            if version is None:
+                raise ValueError(f"No model registered in {self.registry.root_dir}")
+
+            memory_before = current_memory_mb()
+            start = time.perf_counter()
+            classifier = SpamClassifier(*self.registry.paths(version), **self.classifier_kwargs)
+            loaded = time.perf_counter()
+            classifier.classify_batch(self.warmup_messages)
+            warmed = time.perf_counter()
+
+            if self.classifier is not None:
+                # The initial load is not a swap
+                self.swaps += 1
+            self.classifier = classifier
+            self.version = version
+            self.last_swap = {
+                'version': version,
+                'load_seconds': loaded - start,
+                'warmup_seconds': warmed - loaded,
+                'memory_delta_mb': current_memory_mb() - memory_before
+            }
+            print(f"🔁 Serving model version {version} "
+                  f"(load {self.last_swap['load_seconds'] * 1000:.1f} ms, "
+                  f"warm-up {self.last_swap['warmup_seconds'] * 1000:.1f} ms)")
+            return version
+
+    def check(self):
+        """
+        Reload if the registry's current version differs from the live one
+        """
+        version = self.registry.current_version()
+        if version is not None and version != self.version:
+            self.reload(version)
+            return True
+        return False
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Keep serving the live model if the new one fails to load
+                print(f"❌ Model reload failed: {e}")
+
+    def start(self):
+        """
+        Poll the registry for version changes in a background thread
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name='spam-model-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def after_fork(self):
+        """
+        Start a fresh watcher in a forked child, which inherits the parent's
+        thread object and locks but not the running thread
+        """
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        return self.start()
+
+    def stats(self):
+        """
+        Return the live version and the timing/memory cost of the last swap
+        """
+        return dict(self.last_swap, swaps=self.swaps, live_version=self.version)
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on the reloader itself
+        if name == 'classifier':
+            raise AttributeError(name)
+        return getattr(self.classifier, name)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry")
+    parser.add_argument('root_dir', help="Registry directory")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    register_parser = subparsers.add_parser('register', help="Add a new model version")
+    register_parser.add_argument('model_path')
+    register_parser.add_argument('vectorizer_path', nargs='?',
+                                 help="Vectorizer pickle (omit for compact artifacts)")
+    register_parser.add_argument('--activate', action='store_true')
+    register_parser.add_argument('--notes', default='')
+
+    activate_parser = subparsers.add_parser('activate', help="Switch the current version")
+    activate_parser.add_argument('version', type=int)
+
+    subparsers.add_parser('list', help="Show registered versions")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root_dir)
+    if args.command == 'register':
+        registry.register(args.model_path, args.vectorizer_path, activate=args.activate, notes=args.notes)
+    elif args.command == 'activate':
+        registry.activate(args.version)
+        print(f"Version {args.version} is now current")
+    else:
+        manifest = registry.manifest()
+        for entry in manifest['versions']:
+            marker = '*' if entry['version'] == manifest['current'] else ' '
+            print(f"{marker} v{entry['version']}  {entry['created']}  {entry['model']}  {entry['notes']}")
@@ -0,0 +1,123 @@
+import numpy as np
+import scipy.sparse as sp
+
+from keywords import KeywordMatcher, keyword_weights
+
+SPECIAL_CHARACTERS = '$£€!'
+
+class RuleFeatureExtractor:
+    """
+    Batch version of SpamDetector's hand-written signals
+
+    Keyword hits for a whole array of messages come from one scan of the
+    joined text (KeywordMatcher.find_batch); scores, ratios and the
+    short-message flag are then computed with NumPy over the batch.
+
+    fit learns the largest log-scaled spam and ham scores of the training
+    messages, so every feature lies in [0, 1] like L2-normalized TF-IDF
+    values (scores above the training maximum are clipped to 1).
+    """
+    FEATURE_NAMES = ['rule_spam_score', 'rule_ham_score', 'rule_spam_ratio',
+                     'rule_special_char_ratio', 'rule_short_message']
+
+    def __init__(self, short_message_length=20):
+        self.short_message_length = short_message_length
+        spam_weights, ham_weights = keyword_weights()
+        self.matcher = KeywordMatcher(list(spam_weights) + list(ham_weights))
+        self.spam_weights = np.array([spam_weights.get(k, 0) for k in self.matcher.keywords], dtype=np.float64)
+        self.ham_weights = np.array([ham_weights.get(k, 0) for k in self.matcher.keywords], dtype=np.float64)
+        self._special = np.array([ord(char) for char in SPECIAL_CHARACTERS], dtype=np.uint32)
+        self.score_scale = None
+
+    def fit(self, messages):
+        """
+        Learn the log1p(score) maxima used to scale the keyword scores
+        """
+        scores = self.scores(messages)
+        # At least 1, so a corpus without keyword hits never divides by zero
+        self.score_scale = np.maximum(
+            [np.log1p(scores['spam_score'].max(initial=0)), np.log1p(scores['ham_score'].max(initial=0))], 1.0)
+        return self
+
+    def scores(self, messages):
+        """
+        Raw rule signals for each message as a dict of arrays: spam_score,
+        ham_score (as SpamDetector computes them), length and special_chars
+        """
+        messages = list(messages)
+        hits = self.matcher.find_batch([message.lower() for message in messages])
+
+        # Count $£€! over every message at once on the UTF-32 code points
+        lengths = np.fromiter((len(message) for message in messages), dtype=np.int64, count=len(messages))
+        code_points = np.frombuffer(''.join(messages).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        is_special = np.isin(code_points, self._special).astype(np.int64)
+        boundaries = np.concatenate([[0], np.cumsum(lengths)])
+        cumulative = np.concatenate([[0], np.cumsum(is_special)])
+        special_chars = cumulative[boundaries[1:]] - cumulative[boundaries[:-1]]
+
+        return {
+            'spam_score': hits @ self.spam_weights,
+            'ham_score': hits @ self.ham_weights,
+            'length': lengths,
+            'special_chars': special_chars
+        }
+
+    def transform(self, messages):
+        """
+        Rule features in [0, 1] as an (n, 5) CSR matrix
+        """
+        if self.score_scale is None:
+            raise ValueError("RuleFeatureExtractor must be fitted before transform")
+        scores = self.scores(messages)
+        spam_score = scores['spam_score']
+        ham_score = scores['ham_score']
+        total = spam_score + ham_score
+        lengths = np.maximum(scores['length'], 1)
+
+        log_scores = np.column_stack([np.log1p(spam_score), np.log1p(ham_score)])
+        log_scores = np.minimum(log_scores / self.score_scale, 1.0)
+
+        features = np.column_stack([
+            log_scores,
+            np.divide(spam_score, total, out=np.zeros_like(total), where=total > 0),
+            scores['special_chars'] / lengths,
+            (scores['length'] < self.short_message_length).astype(np.float64)
+        ])
+        return sp.csr_matrix(features)
+
+class RuleAugmentedVectorizer:
+    """
+    Appends RuleFeatureExtractor columns to a text vectorizer's output
+
+    The rule signals need the raw message (casing, digits, currency symbols)
+    while the text vectorizer sees preprocessed text, so transform takes
+    both; SpamClassifier checks uses_raw_text and passes the raw messages.
+    """
+    uses_raw_text = True
+
+    def __init__(self, text_vectorizer, rules=None, rule_weight=1.0):
+        self.text_vectorizer = text_vectorizer
+        self.rules = rules if rules is not None else RuleFeatureExtractor()
+        self.rule_weight = rule_weight
+
+    @property
+    def needs_preprocessing(self):
+        # Follows the wrapped vectorizer, so CharNgramVectorizer still sees raw text
+        return getattr(self.text_vectorizer, 'needs_preprocessing', True)
+
+    def _combine(self, X_text, raw_texts):
+        X_rules = self.rules.transform(raw_texts) * self.rule_weight
+        return sp.hstack([X_text, X_rules], format='csr')
+
+    def fit_transform(self, cleaned_texts, raw_texts):
+        self.rules.fit(raw_texts)
+        return self._combine(self.text_vectorizer.fit_transform(cleaned_texts), raw_texts)
+
+    def transform(self, cleaned_texts, raw_texts=None):
+        if raw_texts is None:
+            raise ValueError("RuleAugmentedVectorizer.transform needs the raw messages")
+        return self._combine(self.text_vectorizer.transform(cleaned_texts), raw_texts)
+
+    def get_feature_names_out(self):
+        return np.concatenate([self.text_vectorizer.get_feature_names_out(),
+                               RuleFeatureExtractor.FEATURE_NAMES])
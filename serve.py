@@ -0,0 +1,164 @@
+import argparse
+import gc
+import signal
+import socket
+import threading
+import time
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+# Add src to path so we can import our modules
+sys.path.append(os.path.dirname(__file__))
+
+class _RequestHandler(WSGIRequestHandler):
+    # One request per connection, so an idle keep-alive client never holds
+    # one of the worker's fixed pool threads
+    protocol_version = 'HTTP/1.0'
+
+class _QuietRequestHandler(_RequestHandler):
+    def log_request(self, code='-', size='-'):
+        pass
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    Werkzeug WSGI server that handles requests on a fixed-size thread pool
+
+    Serves on an already listening socket (fd) shared by every worker.
+    drain() stops accepting and waits for in-flight requests to finish.
+    """
+    multithread = True
+
+    def __init__(self, app, fd, threads=8, access_log=True):
+        handler = _RequestHandler if access_log else _QuietRequestHandler
+        super().__init__('0.0.0.0', 0, app, handler=handler, fd=fd)
+        self.pool = ThreadPoolExecutor(threads, thread_name_prefix='spam-http')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def drain(self):
+        self.shutdown()
+        self.pool.shutdown(wait=True)
+
+def _run_worker(app_module, listener, threads, access_log):
+    """
+    Body of a forked worker: serve until SIGTERM/SIGINT, then drain and exit
+    """
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+
+    app_module.after_fork()
+    server = PooledWSGIServer(app_module.app, listener.fileno(), threads=threads, access_log=access_log)
+    threading.Thread(target=server.serve_forever, name='spam-accept', daemon=True).start()
+    print(f"👷 Worker {os.getpid()} serving with {threads} threads")
+
+    stop.wait()
+    server.drain()
+    print(f"👋 Worker {os.getpid()} stopped")
+
+def _spawn(app_module, listener, threads, access_log):
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            _run_worker(app_module, listener, threads, access_log)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            # Skip the parent's atexit handlers and buffered state
+            sys.stdout.flush()
+            os._exit(exit_code)
+    return pid
+
+def serve(host='0.0.0.0', port=5000, workers=2, threads=8, graceful_timeout=30.0, access_log=True):
+    """
+    Pre-fork production server for app_final
+
+    The parent imports app_final (loading the model once), warms it up and
+    freezes the heap for the garbage collector, then forks workers that
+    accept on one shared socket. The model's memory is shared copy-on-write
+    between workers; compact artifacts are additionally memory-mapped, so
+    their pages stay shared even as reference counts change. Workers that
+    exit unexpectedly are replaced. SIGTERM or SIGINT stops the workers
+    accepting, waits up to graceful_timeout seconds for in-flight requests
+    and then kills any stragglers. Metrics are per worker.
+    """
+    import app_final
+    from registry import HotReloader
+
+    app_final.warm_up()
+    if isinstance(app_final.model_server, HotReloader):
+        # Each worker starts its own watcher after the fork
+        app_final.model_server.stop()
+    # Keep the collector from writing to (and un-sharing) the model's pages
+    gc.freeze()
+
+    listener = socket.create_server((host, port), backlog=2048)
+    listener.set_inheritable(True)
+    print(f"🚀 Serving on http://{host}:{port} with {workers} workers x {threads} threads "
+          f"(parent {os.getpid()})")
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+
+    children = {_spawn(app_final, listener, threads, access_log) for _ in range(workers)}
+    while not stopping.is_set():
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid in children:
+            # Forget every reaped worker, even if shutdown began meanwhile
+            children.discard(pid)
+            if not stopping.is_set():
+                print(f"❌ Worker {pid} exited with status {status}; restarting")
+                children.add(_spawn(app_final, listener, threads, access_log))
+        stopping.wait(0.2)
+
+    print("🛑 Shutting down workers...")
+    for pid in children:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    deadline = time.monotonic() + graceful_timeout
+    while children and time.monotonic() < deadline:
+        pid, _ = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            children.discard(pid)
+        else:
+            time.sleep(0.05)
+    for pid in children:
+        print(f"⚠️  Worker {pid} did not stop in {graceful_timeout:.0f}s; killing")
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+    listener.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-worker production server for the spam classifier")
+    parser.add_argument('--host', default=os.environ.get('SPAM_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('SPAM_PORT', 5000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SPAM_WORKERS', os.cpu_count())),
+                        help="Forked worker processes")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('SPAM_THREADS', 8)),
+                        help="Request threads per worker")
+    parser.add_argument('--graceful-timeout', type=float,
+                        default=float(os.environ.get('SPAM_GRACEFUL_TIMEOUT', 30.0)),
+                        help="Seconds to let in-flight requests finish on shutdown")
+    parser.add_argument('--no-access-log', action='store_true', help="Do not log every request")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, workers=args.workers, threads=args.threads,
+          graceful_timeout=args.graceful_timeout, access_log=not args.no_access_log)
@@ -0,0 +1,147 @@
+import argparse
+import time
+import os
+import sys
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.preprocessing import normalize
+
+# Add src to path so we can import our modules
+sys.path.append(os.path.dirname(__file__))
+
+from metrics import peak_memory_mb
+from preprocess import preprocess_parallel
+from utils import iter_dataset, save_model
+
+class StreamingTfidfVectorizer:
+    """
+    Stateless hashing featurizer with an online IDF estimate
+
+    Term counts come from a HashingVectorizer, so no vocabulary is kept in
+    memory. Document frequencies are accumulated per hashed column with
+    partial_fit and turned into smoothed IDF weights the same way
+    TfidfVectorizer does.
+    """
+    def __init__(self, n_features=2 ** 18, ngram_range=(1, 1)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.hasher = HashingVectorizer(n_features=n_features, ngram_range=ngram_range,
+                                        alternate_sign=False, norm=None)
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.n_documents = 0
+
+    def partial_fit(self, texts):
+        """
+        Update document frequencies with a chunk of preprocessed texts
+        """
+        counts = self.hasher.transform(texts)
+        self._update(counts)
+        return self
+
+    def _update(self, counts):
+        counts = counts.tocsc()
+        self.document_frequency += np.diff(counts.indptr)
+        self.n_documents += counts.shape[0]
+
+    @property
+    def idf_(self):
+        return np.log((1 + self.n_documents) / (1 + self.document_frequency)) + 1
+
+    def _weight(self, counts):
+        counts = counts.tocsr().astype(np.float64)
+        counts = counts @ sp.diags(self.idf_, format='csr')
+        return normalize(counts, norm='l2', copy=False)
+
+    def partial_fit_transform(self, texts):
+        """
+        Update document frequencies with a chunk and return its TF-IDF rows
+        """
+        counts = self.hasher.transform(texts)
+        self._update(counts)
+        return self._weight(counts)
+
+    def transform(self, texts):
+        """
+        Transform preprocessed texts into L2-normalized TF-IDF rows
+        """
+        return self._weight(self.hasher.transform(texts))
+
+STREAMING_MODELS = {
+    'naive_bayes': lambda: MultinomialNB(),
+    'sgd': lambda: SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42)
+}
+
+def train_streaming(data_path, model_name='naive_bayes', chunk_size=100000,
+                    n_workers=1, n_features=2 ** 18, save=True):
+    """
+    Train an incremental model over a CSV streamed in chunks
+
+    Each chunk is scored before it is learned from (progressive validation),
+    so accuracy is reported without holding a test split in memory.
+    """
+    print(f"🚀 Starting streaming training ({model_name}, {chunk_size} rows per chunk)...")
+
+    vectorizer = StreamingTfidfVectorizer(n_features=n_features)
+    model = STREAMING_MODELS[model_name]()
+    classes = np.array([0, 1])
+
+    rows = 0
+    correct = 0
+    scored = 0
+    start = time.perf_counter()
+
+    for chunk in iter_dataset(data_path, chunk_size=chunk_size):
+        cleaned_texts = preprocess_parallel(chunk['text'], n_workers=n_workers)
+        X = vectorizer.partial_fit_transform(cleaned_texts)
+        y = chunk['label'].to_numpy()
+
+        if rows > 0:
+            correct += int((model.predict(X) == y).sum())
+            scored += len(y)
+
+        model.partial_fit(X, y, classes=classes)
+        rows += len(y)
+
+        elapsed = time.perf_counter() - start
+        print(f"   {rows} rows, {rows / elapsed:.0f} rows/sec, peak memory {peak_memory_mb():.0f} MB")
+
+    elapsed = time.perf_counter() - start
+    if rows == 0:
+        print("❌ No rows read from dataset.")
+        return None
+
+    report = {
+        'rows': rows,
+        'seconds': elapsed,
+        'seconds_per_million_rows': elapsed / rows * 1e6,
+        'peak_memory_mb': peak_memory_mb(),
+        'progressive_accuracy': correct / scored if scored else None
+    }
+
+    print(f"\n🎯 Streaming training completed!")
+    print(f"⏱️  {report['seconds_per_million_rows']:.1f} s per million rows")
+    print(f"💾 Peak memory: {report['peak_memory_mb']:.0f} MB")
+    if report['progressive_accuracy'] is not None:
+        print(f"📊 Progressive validation accuracy: {report['progressive_accuracy']:.4f}")
+
+    if save:
+        save_model(model, vectorizer, f"streaming_{model_name}")
+
+    return model, vectorizer, report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Out-of-core training with partial_fit")
+    parser.add_argument('data_path', help="CSV file to stream")
+    parser.add_argument('--model', choices=sorted(STREAMING_MODELS), default='naive_bayes')
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Preprocessing worker processes (0 = all cores)")
+    parser.add_argument('--n-features', type=int, default=2 ** 18)
+    args = parser.parse_args()
+
+    train_streaming(args.data_path, model_name=args.model, chunk_size=args.chunk_size,
+                    n_workers=args.workers or None, n_features=args.n_features)
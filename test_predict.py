@@ -0,0 +1,34 @@
+import os
+import sys
+
+import joblib
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+# Add src to path so we can import our modules
+sys.path.append(os.path.dirname(__file__))
+
+from char_ngrams import CharNgramVectorizer
+from predict import SpamClassifier
+from rule_features import RuleAugmentedVectorizer
+from utils import load_dataset
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spam.csv')
+
+def test_char_rule_features_served_like_training(tmp_path):
+    """
+    SpamClassifier must feed a char n-gram + rule feature vectorizer the raw
+    messages it was trained on, not NLTK-preprocessed text
+    """
+    df = load_dataset(DATA_PATH).iloc[:1000]
+    texts = df['text'].tolist()
+    labels = df['label'].to_numpy()
+
+    vectorizer = RuleAugmentedVectorizer(CharNgramVectorizer())
+    model = LogisticRegression(max_iter=1000).fit(vectorizer.fit_transform(texts, texts), labels)
+    joblib.dump(model, tmp_path / 'model.pkl')
+    joblib.dump(vectorizer, tmp_path / 'vectorizer.pkl')
+
+    classifier = SpamClassifier(str(tmp_path / 'model.pkl'), str(tmp_path / 'vectorizer.pkl'))
+    expected = model.predict_proba(vectorizer.transform(texts, texts))
+    np.testing.assert_allclose(classifier.predict_proba_batch(texts), expected)
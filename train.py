@@ -1,26 +1,183 @@
-import pandas as pd
+import numpy as np
+from joblib import Parallel, delayed
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
 from sklearn.naive_bayes import MultinomialNB
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.svm import SVC, LinearSVC
+import argparse
+import json
+import time
 import os
 import sys
 
 # Add src to path so we can import our modules
 sys.path.append(os.path.dirname(__file__))
 
-from preprocess import preprocess_text
+from artifact import WEIGHT_DTYPES
+from compress import PRUNE_METHODS, compression_report
+from char_ngrams import CharNgramVectorizer
+from corpus_cache import CorpusCache
+from preprocess import TextPreprocessor, preprocess_parallel
+from rule_features import RuleAugmentedVectorizer
+from streaming import STREAMING_MODELS, train_streaming
 from utils import load_dataset, analyze_dataset, evaluate_model, save_model, plot_class_distribution
 
-def train_model():
+DEFAULT_CACHE_DIR = os.path.join('..', 'cache')
+
+# Candidate models, built fresh for every fit
+MODEL_CANDIDATES = {
+    'Naive Bayes': lambda: MultinomialNB(),
+    'Logistic Regression': lambda: LogisticRegression(max_iter=1000, random_state=42),
+    'SVM': lambda: SVC(kernel='linear', random_state=42),
+    'Linear SVC': lambda: LinearSVC(random_state=42),
+    'SGD': lambda: SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42)
+}
+
+def _fit_and_score(name, fold, model, X_train, y_train, X_val, y_val):
+    """
+    Fit one model on one split, returning its timing and accuracy
+    """
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    accuracy = accuracy_score(y_val, model.predict(X_val))
+    return name, fold, model, fit_seconds, accuracy
+
+def _predict_latency(model, X, n_samples=200):
+    """
+    Median single-message and amortized batch predict latency in microseconds
+    """
+    rows = [X[i] for i in range(min(n_samples, X.shape[0]))]
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    model.predict(X)
+    batch_seconds = time.perf_counter() - start
+    
+    return float(np.median(timings)) * 1e6, batch_seconds / X.shape[0] * 1e6
+
+def select_models(models, X_train, y_train, X_test, y_test, cv_folds=5, n_jobs=None):
+    """
+    Cross-validate and fit every candidate in parallel, returning
+    (fitted models, machine-readable report)
+    
+    All (model, fold) fits plus each model's final fit on the full training
+    split are dispatched as one flat batch of joblib tasks.
+    """
+    tasks = []
+    if cv_folds > 1:
+        splitter = StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=42)
+        for fold, (train_idx, val_idx) in enumerate(splitter.split(X_train, y_train)):
+            for name, factory in models.items():
+                tasks.append(delayed(_fit_and_score)(
+                    name, fold, factory(), X_train[train_idx], y_train[train_idx],
+                    X_train[val_idx], y_train[val_idx]))
+    for name, factory in models.items():
+        tasks.append(delayed(_fit_and_score)(name, 'holdout', factory(), X_train, y_train, X_test, y_test))
+    
+    results = Parallel(n_jobs=n_jobs)(tasks)
+    
+    fitted = {}
+    report = {name: {'cv_accuracy': []} for name in models}
+    for name, fold, model, fit_seconds, accuracy in results:
+        if fold == 'holdout':
+            fitted[name] = model
+            report[name]['fit_seconds'] = fit_seconds
+            report[name]['test_accuracy'] = accuracy
+        else:
+            report[name]['cv_accuracy'].append(accuracy)
+    
+    # Latency is measured sequentially so parallel fits don't skew it
+    for name, model in fitted.items():
+        cv_scores = report[name].pop('cv_accuracy')
+        report[name]['cv_accuracy_mean'] = float(np.mean(cv_scores)) if cv_scores else None
+        report[name]['cv_accuracy_std'] = float(np.std(cv_scores)) if cv_scores else None
+        single_us, batch_us = _predict_latency(model, X_test)
+        report[name]['predict_latency_us'] = single_us
+        report[name]['batch_predict_us_per_message'] = batch_us
+    
+    return fitted, report
+
+def compare_tokenizers(data_path, model_names=None):
+    """
+    Compare the NLTK word TF-IDF path with hashed character n-grams on the
+    same train/test split: feature throughput on the held-out messages
+    (word path with a cold and a warm stem cache) and test accuracy of each
+    candidate model, fitted without cross-validation
+    """
+    df = load_dataset(data_path)
+    if df is None:
+        return None
+    texts = df['text'].tolist()
+    y = df['label'].to_numpy()
+    train_texts, test_texts, y_train, y_test = train_test_split(texts, y, test_size=0.2, random_state=42)
+    models = {name: MODEL_CANDIDATES[name] for name in (model_names or MODEL_CANDIDATES)}
+    
+    def throughput(transform):
+        start = time.perf_counter()
+        X = transform(test_texts)
+        return X, len(test_texts) / (time.perf_counter() - start)
+    
+    preprocessor = TextPreprocessor()
+    word_vectorizer = TfidfVectorizer(max_features=5000)
+    char_vectorizer = CharNgramVectorizer()
+    pipelines = {
+        'word': (lambda batch: word_vectorizer.fit_transform([preprocessor(text) for text in batch]),
+                 lambda batch: word_vectorizer.transform([preprocessor(text) for text in batch])),
+        'char': (char_vectorizer.fit_transform, char_vectorizer.transform)
+    }
+    
+    results = {}
+    for tokenizer, (fit_transform, transform) in pipelines.items():
+        X_train = fit_transform(train_texts)
+        preprocessor.stem.cache_clear()
+        X_test, cold_msgs_per_sec = throughput(transform)
+        _, warm_msgs_per_sec = throughput(transform)
+        accuracy = {name: float(accuracy_score(y_test, factory().fit(X_train, y_train).predict(X_test)))
+                    for name, factory in models.items()}
+        results[tokenizer] = {'cold_msgs_per_sec': cold_msgs_per_sec,
+                              'warm_msgs_per_sec': warm_msgs_per_sec, 'accuracy': accuracy}
+    
+    print(f"\n{'='*50}")
+    print(f"TOKENIZER COMPARISON ({len(test_texts)} held-out messages)")
+    print(f"{'='*50}")
+    for tokenizer, stats in results.items():
+        print(f"{tokenizer:<5} {stats['cold_msgs_per_sec']:.0f} msgs/sec cold, "
+              f"{stats['warm_msgs_per_sec']:.0f} msgs/sec warm")
+        for name, accuracy in stats['accuracy'].items():
+            print(f"      {name:<20} accuracy={accuracy:.4f}")
+    return results
+
+def train_model(n_workers=1, chunk_size=1000, data_path=None, model_names=None,
+                cv_folds=5, n_jobs=None, report_path=None, cache_dir=DEFAULT_CACHE_DIR,
+                rule_features=False, compress_sizes=None, prune_method='chi2', quantize='float32',
+                tokenizer='word'):
     """
     Main training function for the spam classifier
+    
+    n_workers and chunk_size control the process pool used for preprocessing
+    (n_workers=None uses every available core). Candidate models and CV
+    folds are fitted in parallel with n_jobs joblib workers, and a JSON
+    report of accuracy, fit time and predict latency is written to
+    report_path. Preprocessed text and TF-IDF features are cached under
+    cache_dir (None disables the cache). rule_features appends the
+    rule-based keyword signals to the TF-IDF features. compress_sizes lists
+    vocabulary sizes to prune the best model to (by prune_method), exporting
+    each as a quantize-typed artifact and reporting the trade-off.
+    tokenizer='char' replaces NLTK preprocessing and word TF-IDF with
+    hashed character n-grams over normalized raw messages.
     """
     print("🚀 Starting Email Spam Classifier Training...")
     
     # Load data using utils
-    data_path = os.path.join('..', 'data', 'spam.csv')
+    if data_path is None:
+        data_path = os.path.join('..', 'data', 'spam.csv')
     df = load_dataset(data_path)
     
     if df is None:
@@ -31,15 +188,61 @@ def train_model():
     df = analyze_dataset(df)
     plot_class_distribution(df)
     
-    # Preprocess text
-    print("🔄 Preprocessing text...")
-    df['cleaned_text'] = df['text'].apply(preprocess_text)
+    vectorizer_params = {'max_features': 5000}
+    if tokenizer == 'char':
+        vectorizer_params = {'tokenizer': 'char', 'n_features': 2 ** 18, 'ngram_range': (2, 3)}
+    cache = CorpusCache(cache_dir) if cache_dir else None
+    cached_features = None
+    cleaned_texts = None
+    if cache is not None:
+        corpus_key = cache.corpus_key(data_path)
+        # Code that builds the features beyond preprocess.py (already in corpus_key)
+        feature_modules = ['char_ngrams'] if tokenizer == 'char' else []
+        if rule_features:
+            feature_modules += ['rule_features', 'keywords']
+        features_key = cache.features_key(corpus_key, dict(vectorizer_params, rule_features=rule_features),
+                                          feature_modules)
+        cached_features = cache.load_features(features_key)
+    
+    if cached_features is not None:
+        print(f"♻️  Using cached features ({features_key})")
+        X, vectorizer = cached_features
+    else:
+        features_start = time.perf_counter()
+        if tokenizer == 'char':
+            # CharNgramVectorizer normalizes the raw messages itself
+            cleaned_texts = df['text'].tolist()
+        else:
+            cleaned_texts = cache.load_corpus(corpus_key) if cache is not None else None
+            if cleaned_texts is not None:
+                print(f"♻️  Using cached preprocessed text ({corpus_key})")
+            else:
+                # Preprocess text
+                print(f"🔄 Preprocessing text ({n_workers or os.cpu_count()} workers)...")
+                cleaned_texts = preprocess_parallel(df['text'], n_workers=n_workers, chunk_size=chunk_size)
+                if cache is not None:
+                    cache.save_corpus(corpus_key, cleaned_texts)
+        
+        # TF-IDF Vectorization
+        print("🔧 Creating features...")
+        if tokenizer == 'char':
+            vectorizer = CharNgramVectorizer(n_features=vectorizer_params['n_features'],
+                                             ngram_range=vectorizer_params['ngram_range'])
+        else:
+            vectorizer = TfidfVectorizer(**vectorizer_params)
+        if rule_features:
+            # Append the SpamDetector keyword/character signals as extra columns
+            vectorizer = RuleAugmentedVectorizer(vectorizer)
+            X = vectorizer.fit_transform(cleaned_texts, df['text'].tolist())
+        else:
+            X = vectorizer.fit_transform(cleaned_texts)
+        features_seconds = time.perf_counter() - features_start
+        print(f"⏱️  Features for {len(df)} messages in {features_seconds:.2f}s "
+              f"({len(df) / features_seconds:.0f} msgs/sec, {tokenizer} tokenizer)")
+        if cache is not None:
+            cache.save_features(features_key, X, vectorizer)
     
-    # TF-IDF Vectorization
-    print("🔧 Creating features...")
-    vectorizer = TfidfVectorizer(max_features=5000)
-    X = vectorizer.fit_transform(df['cleaned_text'])
-    y = df['label']
+    y = df['label'].to_numpy()
     
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -47,20 +250,17 @@ def train_model():
     print(f"📊 Test set: {X_test.shape[0]} samples")
     
     # Models to try
-    models = {
-        'Naive Bayes': MultinomialNB(),
-        'Logistic Regression': LogisticRegression(max_iter=1000, random_state=42),
-        'SVM': SVC(kernel='linear', random_state=42)
-    }
+    models = {name: MODEL_CANDIDATES[name] for name in (model_names or MODEL_CANDIDATES)}
+    
+    print(f"\n🧠 Training {len(models)} models with {cv_folds}-fold CV in parallel...")
+    fitted, report = select_models(models, X_train, y_train, X_test, y_test,
+                                   cv_folds=cv_folds, n_jobs=n_jobs)
     
     best_model = None
     best_score = 0
     best_model_name = ""
     
-    print("\n🧠 Training models...")
-    for name, model in models.items():
-        print(f"\n📋 Training {name}...")
-        model.fit(X_train, y_train)
+    for name, model in fitted.items():
         y_pred = model.predict(X_test)
         
         # Evaluate using utils
@@ -71,12 +271,93 @@ def train_model():
             best_model = model
             best_model_name = name
     
+    print(f"\n{'='*50}")
+    print("MODEL SELECTION REPORT")
+    print(f"{'='*50}")
+    for name, stats in report.items():
+        cv = f"{stats['cv_accuracy_mean']:.4f}" if stats['cv_accuracy_mean'] is not None else "n/a"
+        print(f"{name:<20} test={stats['test_accuracy']:.4f} cv={cv} "
+              f"fit={stats['fit_seconds']:.2f}s predict={stats['predict_latency_us']:.0f}µs")
+    
+    if report_path is None:
+        report_path = os.path.join('..', 'models', 'model_selection_report.json')
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump({'best_model': best_model_name, 'cv_folds': cv_folds, 'models': report}, f, indent=2)
+    print(f"Report saved to: {report_path}")
+    
     # Save best model using utils
     print(f"\n💾 Saving best model: {best_model_name}...")
     save_model(best_model, vectorizer, best_model_name.lower().replace(" ", "_"))
     
+    if compress_sizes:
+        if (rule_features or tokenizer != 'word'
+                or not hasattr(best_model, 'coef_') and not hasattr(best_model, 'feature_log_prob_')):
+            print("⚠️  Compression needs a linear model on plain word TF-IDF features; skipping")
+        else:
+            if cleaned_texts is None:
+                cleaned_texts = cache.load_corpus(corpus_key) if cache is not None else None
+            if cleaned_texts is None:
+                cleaned_texts = preprocess_parallel(df['text'], n_workers=n_workers, chunk_size=chunk_size)
+            # Same permutation as the train/test split above
+            _, test_index = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42)
+            compression = compression_report(
+                best_model, vectorizer, X_train, y_train, [cleaned_texts[i] for i in test_index], y_test,
+                compress_sizes, method=prune_method, dtype=quantize,
+                output_dir=os.path.join('..', 'models'), model_name=best_model_name.lower().replace(" ", "_"))
+            with open(report_path, 'w') as f:
+                json.dump({'best_model': best_model_name, 'cv_folds': cv_folds, 'models': report,
+                           'compression': compression}, f, indent=2)
+    
     print(f"\n🎯 Training completed!")
     print(f"🏆 Best model: {best_model_name} with accuracy: {best_score:.4f}")
 
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the spam classifier")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Preprocessing worker processes (0 = all cores)")
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help="Messages per preprocessing task")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Train out-of-core with hashing features and partial_fit")
+    parser.add_argument('--streaming-model', choices=sorted(STREAMING_MODELS), default='naive_bayes')
+    parser.add_argument('--streaming-chunk-size', type=int, default=100000,
+                        help="CSV rows read per streaming chunk")
+    parser.add_argument('--data', default=os.path.join('..', 'data', 'spam.csv'),
+                        help="Dataset path")
+    parser.add_argument('--models', nargs='+', choices=list(MODEL_CANDIDATES),
+                        help="Subset of candidate models to train")
+    parser.add_argument('--cv-folds', type=int, default=5,
+                        help="Cross-validation folds (1 disables CV)")
+    parser.add_argument('--jobs', type=int, default=-1,
+                        help="Parallel model/fold fits (-1 = all cores)")
+    parser.add_argument('--report', help="Path of the JSON model selection report")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="Directory for cached preprocessed text and features")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always preprocess and vectorize from scratch")
+    parser.add_argument('--rule-features', action='store_true',
+                        help="Append SpamDetector keyword/character features to TF-IDF")
+    parser.add_argument('--tokenizer', choices=['word', 'char'], default='word',
+                        help="NLTK word TF-IDF or hashed character n-grams of normalized raw text")
+    parser.add_argument('--compare-tokenizers', action='store_true',
+                        help="Report speed and accuracy of both tokenizers instead of training")
+    parser.add_argument('--compress', type=int, nargs='+', metavar='SIZE',
+                        help="Prune the best model to these vocabulary sizes and report the trade-off")
+    parser.add_argument('--prune-method', choices=PRUNE_METHODS, default='chi2')
+    parser.add_argument('--quantize', choices=WEIGHT_DTYPES, default='float32',
+                        help="Storage type for pruned artifact weights")
+    args = parser.parse_args()
+    
+    if args.compare_tokenizers:
+        compare_tokenizers(args.data, model_names=args.models)
+    elif args.streaming:
+        train_streaming(args.data, model_name=args.streaming_model,
+                        chunk_size=args.streaming_chunk_size, n_workers=args.workers or None)
+    else:
+        train_model(n_workers=args.workers or None, chunk_size=args.chunk_size,
+                    data_path=args.data, model_names=args.models, cv_folds=args.cv_folds,
+                    n_jobs=args.jobs, report_path=args.report,
+                    cache_dir=None if args.no_cache else args.cache_dir,
+                    rule_features=args.rule_features, compress_sizes=args.compress,
+                    prune_method=args.prune_method, quantize=args.quantize, tokenizer=args.tokenizer)
\ No newline at end of file
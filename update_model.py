@@ -0,0 +1,86 @@
+import argparse
+import re
+import time
+import os
+import sys
+
+import joblib
+import numpy as np
+
+# Add src to path so we can import our modules
+sys.path.append(os.path.dirname(__file__))
+
+from preprocess import preprocess_parallel
+from streaming import StreamingTfidfVectorizer
+from utils import iter_dataset, save_model
+
+VERSION_PATTERN = re.compile(r'^(?P<base>.+?)(?:_v(?P<version>\d+))?$')
+
+def split_version(model_name):
+    """
+    Split 'name_v3' into ('name', 3); unversioned names are version 0
+    """
+    match = VERSION_PATTERN.match(model_name)
+    return match.group('base'), int(match.group('version') or 0)
+
+def next_version(models_dir, base_name):
+    """
+    One more than the highest existing version of base_name in models_dir
+    """
+    latest = 0
+    if os.path.isdir(models_dir):
+        for filename in os.listdir(models_dir):
+            if filename.endswith('.pkl') and not filename.endswith('_vectorizer.pkl'):
+                base, version = split_version(filename[:-len('.pkl')])
+                if base == base_name:
+                    latest = max(latest, version)
+    return latest + 1
+
+def incremental_update(model_path, vectorizer_path, delta_path, models_dir=None,
+                       chunk_size=100000, n_workers=1):
+    """
+    Update a streaming-trained model with newly labeled messages
+
+    Document frequencies and the model are updated with partial_fit over the
+    delta file only, so the cost is proportional to the delta size. The
+    result is written as the next version (name_vN) next to the input model
+    and the new (model_path, vectorizer_path) is returned.
+    """
+    model = joblib.load(model_path)
+    vectorizer = joblib.load(vectorizer_path)
+    if not isinstance(vectorizer, StreamingTfidfVectorizer) or not hasattr(model, 'partial_fit'):
+        raise ValueError("Incremental updates need a model trained with train.py --streaming")
+
+    if models_dir is None:
+        models_dir = os.path.dirname(model_path) or '.'
+    base_name, _ = split_version(os.path.splitext(os.path.basename(model_path))[0])
+    version = next_version(models_dir, base_name)
+
+    print(f"🔄 Updating {base_name} with {delta_path}...")
+    rows = 0
+    start = time.perf_counter()
+    for chunk in iter_dataset(delta_path, chunk_size=chunk_size):
+        cleaned_texts = preprocess_parallel(chunk['text'], n_workers=n_workers)
+        X = vectorizer.partial_fit_transform(cleaned_texts)
+        model.partial_fit(X, chunk['label'].to_numpy(), classes=np.array([0, 1]))
+        rows += len(chunk)
+    elapsed = time.perf_counter() - start
+
+    print(f"🎯 Applied {rows} labeled messages in {elapsed:.2f}s "
+          f"({vectorizer.n_documents} documents seen in total)")
+    return save_model(model, vectorizer, f"{base_name}_v{version}", models_dir=models_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally update a streaming-trained model")
+    parser.add_argument('model_path')
+    parser.add_argument('vectorizer_path')
+    parser.add_argument('delta_path', help="CSV of newly labeled messages")
+    parser.add_argument('--models-dir', help="Where to write the new version (default: next to the model)")
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Preprocessing worker processes (0 = all cores)")
+    args = parser.parse_args()
+
+    incremental_update(args.model_path, args.vectorizer_path, args.delta_path,
+                       models_dir=args.models_dir, chunk_size=args.chunk_size,
+                       n_workers=args.workers or None)
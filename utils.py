@@ -1,31 +1,37 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.metrics import confusion_matrix, classification_report, accuracy_score
 import joblib
 import os
 
+def _normalize_columns(df):
+    """
+    Reduce a raw dataframe to binary 'label' and 'text' columns
+    """
+    # Keep only relevant columns (different datasets have different column names)
+    if 'v1' in df.columns and 'v2' in df.columns:
+        df = df[['v1', 'v2']]
+        df.columns = ['label', 'text']
+    elif 'Label' in df.columns and 'EmailText' in df.columns:
+        df = df[['Label', 'EmailText']]
+        df.columns = ['label', 'text']
+    else:
+        # Use first two columns
+        df = df.iloc[:, :2]
+        df.columns = ['label', 'text']
+    
+    # Convert labels to binary (0: ham, 1: spam)
+    df['label'] = df['label'].map({'ham': 0, 'spam': 1, 'Ham': 0, 'Spam': 1, 0: 0, 1: 1})
+    
+    return df
+
 def load_dataset(filepath):
     """
     Load and preprocess the spam dataset
     """
     try:
         df = pd.read_csv(filepath, encoding='latin-1')
-        # Keep only relevant columns (different datasets have different column names)
-        if 'v1' in df.columns and 'v2' in df.columns:
-            df = df[['v1', 'v2']]
-            df.columns = ['label', 'text']
-        elif 'Label' in df.columns and 'EmailText' in df.columns:
-            df = df[['Label', 'EmailText']]
-            df.columns = ['label', 'text']
-        else:
-            # Use first two columns
-            df = df.iloc[:, :2]
-            df.columns = ['label', 'text']
-        
-        # Convert labels to binary (0: ham, 1: spam)
-        df['label'] = df['label'].map({'ham': 0, 'spam': 1, 'Ham': 0, 'Spam': 1, 0: 0, 1: 1})
+        df = _normalize_columns(df)
         
         print(f"Dataset loaded successfully: {df.shape[0]} emails")
         print(f"Spam: {df['label'].sum()}, Ham: {len(df) - df['label'].sum()}")
@@ -39,6 +45,17 @@ def load_dataset(filepath):
         print(f"Error loading dataset: {e}")
         return None
 
+def iter_dataset(filepath, chunk_size=100000):
+    """
+    Stream the spam dataset in chunks of at most chunk_size rows
+    """
+    for chunk in pd.read_csv(filepath, encoding='latin-1', chunksize=chunk_size):
+        chunk = _normalize_columns(chunk)
+        chunk = chunk.dropna(subset=['label', 'text'])
+        chunk['label'] = chunk['label'].astype(int)
+        chunk['text'] = chunk['text'].astype(str)
+        yield chunk
+
 def analyze_dataset(df):
     """
     Perform basic EDA on the dataset
@@ -65,6 +82,9 @@ def plot_class_distribution(df):
     """
     Plot the distribution of spam vs ham emails
     """
+    # Imported here so loading data or models never pulls in matplotlib
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(10, 6))
     
     plt.subplot(1, 2, 1)
@@ -100,31 +120,33 @@ def evaluate_model(y_true, y_pred, model_name):
     
     return accuracy
 
-def save_model(model, vectorizer, model_name="spam_classifier"):
+def save_model(model, vectorizer, model_name="spam_classifier", models_dir='../models'):
     """
     Save trained model and vectorizer
     """
     # Create models directory if it doesn't exist
-    os.makedirs('../models', exist_ok=True)
+    os.makedirs(models_dir, exist_ok=True)
     
     # Save model
-    model_path = f'../models/{model_name}.pkl'
+    model_path = os.path.join(models_dir, f'{model_name}.pkl')
     joblib.dump(model, model_path)
     
     # Save vectorizer
-    vectorizer_path = f'../models/{model_name}_vectorizer.pkl'
+    vectorizer_path = os.path.join(models_dir, f'{model_name}_vectorizer.pkl')
     joblib.dump(vectorizer, vectorizer_path)
     
     print(f"Model saved to: {model_path}")
     print(f"Vectorizer saved to: {vectorizer_path}")
+    
+    return model_path, vectorizer_path
 
-def load_model(model_name="spam_classifier"):
+def load_model(model_name="spam_classifier", models_dir='../models'):
     """
     Load trained model and vectorizer
     """
     try:
-        model_path = f'../models/{model_name}.pkl'
-        vectorizer_path = f'../models/{model_name}_vectorizer.pkl'
+        model_path = os.path.join(models_dir, f'{model_name}.pkl')
+        vectorizer_path = os.path.join(models_dir, f'{model_name}_vectorizer.pkl')
         
         model = joblib.load(model_path)
         vectorizer = joblib.load(vectorizer_path)